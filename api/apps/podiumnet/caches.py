@@ -0,0 +1,91 @@
+from flask import g, has_request_context, request
+from os import getenv
+from storage.storagemanager import StorageManager
+from threading import Lock
+from time import monotonic
+
+
+class TTLCache:
+    def __init__(self, *, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.__entries = {}
+        self.__lock = Lock()
+
+    def get(self, key, default=None):
+        with self.__lock:
+            if entry := self.__entries.pop(key, None):
+                if entry[0] > monotonic():
+                    self.__entries[key] = entry
+                    return entry[1]
+        return default
+
+    def set(self, key, value, *, ttl=None):
+        with self.__lock:
+            self.__entries.pop(key, None)
+            while len(self.__entries) >= self.maxsize:
+                self.__entries.pop(next(iter(self.__entries)), None)
+            self.__entries[key] = (monotonic() + (ttl or self.ttl), value)
+        return value
+
+    def invalidate(self, *keys):
+        with self.__lock:
+            for key in keys:
+                self.__entries.pop(key, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+
+class RequestCachedStorage:
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __getattr__(self, name):
+        attribute = getattr(self.storage, name)
+        if not callable(attribute) or name.startswith("get_"):
+            return attribute
+
+        def call_and_evict(*args, **kwargs):
+            clear_request_documents()
+            return attribute(*args, **kwargs)
+
+        return call_and_evict
+
+    def get_item_from_collection_by_id(self, collection, id, *args, **kwargs):
+        if args or kwargs or not self.__is_cacheable_request():
+            return self.storage.get_item_from_collection_by_id(
+                collection, id, *args, **kwargs
+            )
+
+        request_documents = g.setdefault("request_documents", {})
+        if (collection, id) not in request_documents:
+            request_documents[(collection, id)] = (
+                self.storage.get_item_from_collection_by_id(collection, id)
+            )
+        return request_documents[(collection, id)]
+
+    def __is_cacheable_request(self):
+        return has_request_context() and request.method in ["GET", "HEAD"]
+
+
+class RequestCachedStorageManager:
+    def get_db_engine(self):
+        return RequestCachedStorage(
+            StorageManager().get_db_engine()  # pyright: ignore
+        )
+
+
+def clear_request_documents():
+    if has_request_context():
+        g.pop("request_documents", None)
+
+
+asset_tenant_ids = TTLCache(ttl=int(getenv("ASSET_TENANT_CACHE_TTL", "60")))
+origin_redirects = TTLCache(
+    ttl=int(getenv("ORIGIN_REDIRECT_CACHE_TTL", "3600")), maxsize=100000
+)
+ORIGIN_REDIRECT_NEGATIVE_CACHE_TTL = int(
+    getenv("ORIGIN_REDIRECT_NEGATIVE_CACHE_TTL", "60")
+)
@@ -1,3 +1,6 @@
+from apps.podiumnet.caches import asset_tenant_ids
+from apps.podiumnet.object_configurations.util import invalidate_origin_redirects
+from apps.podiumnet.serializers.attribution import refresh_attributions
 from elody.object_configurations.elody_configuration import (
     ElodyConfiguration,
 )
@@ -25,4 +28,15 @@ class AssetConfiguration(ElodyConfiguration):
         return super().serialization(from_format, to_format)
 
     def validation(self):
-        return super().validation()
\ No newline at end of file
+        return super().validation()
+
+    def _post_crud_hook(self, *, crud=None, document=None, **kwargs):
+        if document:
+            asset_tenant_ids.invalidate(
+                document["_id"], *document.get("identifiers", [])
+            )
+            invalidate_origin_redirects(
+                document, kwargs.get("unpatched_document") or {}
+            )
+        refresh_attributions(crud, document, kwargs.get("unpatched_document"))
+        return super()._post_crud_hook(crud=crud, document=document, **kwargs)
\ No newline at end of file
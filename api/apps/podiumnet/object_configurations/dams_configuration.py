@@ -1,18 +1,24 @@
 from app_context import g  # pyright: ignore
+from apps.podiumnet.caches import origin_redirects
 from apps.podiumnet.resources.base_resource import PodiumnetBaseResource
+from apps.podiumnet.object_configurations.util import (
+    ORDERED_RELATION_TYPES,
+    UNSYNCED_RELATED_TYPES,
+    UNSYNCED_RELATION_TYPES,
+    diff_relations,
+    invalidate_origin_redirects,
+    sort_relations,
+)
+from apps.podiumnet.outbox import history_outbox
 from apps.podiumnet.serializers.dams_serializer import DamsSerializer
 from apps.podiumnet.util import generate_deterministic_uuid
 from apps.podiumnet.validation.util import get_schema, get_virtual_properties
 from configuration import get_object_configuration_mapper  # pyright: ignore
-from copy import deepcopy
 from datetime import datetime
 from apps.podiumnet.object_configurations.entity_configuration import (
     EntityConfiguration,
 )
-from elody.util import flatten_dict, send_cloudevent
-from os import getenv
-from rabbit import get_rabbit  # pyright: ignore
-from resources.base_filter_resource import BaseFilterResource  # pyright: ignore
+from elody.util import flatten_dict
 from serialization.case_converter import (  # pyright: ignore
     camel_to_snake,
     snake_to_camel,
@@ -77,7 +83,8 @@ class DamsConfiguration(ElodyConfiguration):
         }
 
     def _post_crud_hook(self, *, crud, document, storage, **kwargs):
-        self.__delete_origins(crud, document, storage)
+        self.__delete_origins(crud, document)
+        invalidate_origin_redirects(document, kwargs.get("unpatched_document") or {})
         self.__sync_relations(crud=crud, document=document, **kwargs)
         super()._post_crud_hook(**kwargs)
         self.__add_document_to_history(document)
@@ -121,96 +128,62 @@ class DamsConfiguration(ElodyConfiguration):
     def __add_document_to_history(self, document):
         if self._should_create_history_object():
             create = get_object_configuration_mapper().get("history").crud()["creator"]
-            send_cloudevent(
-                get_rabbit(),
-                getenv("MQ_EXCHANGE", "dams"),
-                "collection.document.history.create",
-                create(deepcopy(document)),
-            )
+            history_outbox.add(create({**document}))
 
-    def __delete_origins(self, crud, document, storage):
+    def __delete_origins(self, crud, document):
         if crud != "delete":
             return
 
-        origins = (
-            BaseFilterResource()
-            ._execute_advanced_search_with_query_v2(
-                [
-                    {
-                        "type": "text",
-                        "key": ["dams:1|identifiers"],
-                        "value": document["_id"],
-                        "match_exact": True,
-                        "operator": "or",
-                    },
-                    {
-                        "type": "text",
-                        "key": ["dams:1|elody_id"],
-                        "value": document["_id"],
-                        "match_exact": True,
-                        "operator": "or",
-                    },
+        for origins in PodiumnetBaseResource()._cascade_delete(
+            "origins",
+            {
+                "$or": [
+                    {"identifiers": document["_id"]},
+                    {"elody_id": document["_id"]},
                 ],
-                "origins",
-                limit=999999,
-            )
-            .get("results", [])
-        )
-        for origin in origins:
-            storage.delete_item(origin)
+                "schema.type": "dams",
+                "schema.version": 1,
+            },
+            [
+                {
+                    "type": "text",
+                    "key": ["dams:1|identifiers"],
+                    "value": document["_id"],
+                    "match_exact": True,
+                    "operator": "or",
+                },
+                {
+                    "type": "text",
+                    "key": ["dams:1|elody_id"],
+                    "value": document["_id"],
+                    "match_exact": True,
+                    "operator": "or",
+                },
+            ],
+            projection=["_id"],
+            run_post_crud_hook=False,
+        ):
+            origin_redirects.invalidate(*[origin["_id"] for origin in origins])
 
     def __order_relations(self, document, crud=crud, unpatched_document={}, **kwargs):
-        for type in ["hasAssetPart", "hasMediafile"]:
-            order_map = {}
-            order_map.update({"undefined": []})
-            relations = [
-                deepcopy(relation)
-                for relation in document["relations"]
-                if relation["type"] == type
-            ]
-            if crud == "update" and any(
-                relation.get("sort") is None for relation in relations
-            ):
-                continue
+        relations_per_type = {type: [] for type in ORDERED_RELATION_TYPES}
+        for relation in document["relations"]:
+            if relation["type"] in relations_per_type:
+                relations_per_type[relation["type"]].append(relation)
+        if crud == "update":
+            relations_per_type = {
+                type: relations
+                for type, relations in relations_per_type.items()
+                if all(relation.get("sort") is not None for relation in relations)
+            }
 
-            for relation in relations:
-                if (
-                    order := relation.get("sort", {}).get("order", [{}])[0].get("value")
-                ) is not None:
-                    order_map.update({str(order): relation})
-                else:
-                    order_map["undefined"].append(relation)
-                document["relations"].remove(relation)
-
-            created = []
-            order = 1
-            order_map = dict(
-                sorted(
-                    order_map.items(),
-                    key=lambda item: (
-                        int(item[0]) if item[0].isdigit() else float("inf")
-                    ),
-                )
-            )
-            for relations in order_map.values():
-                if not isinstance(relations, list):
-                    relations = [relations]
-                for relation in relations:
-                    created.append(
-                        {
-                            **relation,
-                            "metadata": [
-                                metadata
-                                for metadata in relation.get("metadata", [])
-                                if metadata["key"] != "order"
-                            ]
-                            + [{"key": "order", "value": order}],
-                            "sort": {"order": [{"value": order}]},
-                        }
-                    )
-                    order += 1
-
-            if created:
+        document["relations"] = [
+            relation
+            for relation in document["relations"]
+            if relation["type"] not in relations_per_type
+        ]
+        for type, relations in relations_per_type.items():
+            if created := sort_relations(relations):
                 if type not in get_virtual_properties(document["type"]):
                     document["relations"].extend(created)
                 self.__sync_relations(
@@ -247,66 +220,37 @@ class DamsConfiguration(ElodyConfiguration):
 
     def __sync_relations(self, *, crud, document, created=None, deleted=None, **kwargs):
         unpatched_document = kwargs.get("unpatched_document", {})
-        document = deepcopy(document)
         if document["type"] in ["download", "set"]:
             return
 
-        created = (
-            created
-            if created is not None
-            else [
-                new_relation
-                for new_relation in document["relations"]
-                if not any(
-                    [
-                        old_relation
-                        for old_relation in unpatched_document.get("relations", [])
-                        if new_relation["key"] == old_relation["key"]
-                        and new_relation["type"] == old_relation["type"]
-                    ]
-                )
-            ]
-        )
-        deleted = (
-            deleted
-            if deleted is not None
-            else [
-                old_relation
-                for old_relation in unpatched_document.get("relations", [])
-                if not any(
-                    [
-                        new_relation
-                        for new_relation in document["relations"]
-                        if old_relation["key"] == new_relation["key"]
-                        and old_relation["type"] == new_relation["type"]
-                    ]
-                )
-            ]
-        )
+        if created is None or deleted is None:
+            added, removed, _ = diff_relations(
+                unpatched_document.get("relations", []), document["relations"]
+            )
+            created = created if created is not None else added
+            deleted = deleted if deleted is not None else removed
         if crud == "delete":
-            deleted = deepcopy(created)
+            deleted = created
             created = []
 
-        collection = ""
         base_resource = PodiumnetBaseResource()
-        for relation in [*created, *deleted]:
-            for collection in base_resource._resolve_collections(id=relation["key"]):
-                if related_document := base_resource.storage.get_item_from_collection_by_id(
-                    collection, relation["key"]
-                ):
-                    break
-            else:
-                related_document = {}
-
-            if relation["type"] in [
-                "hasAsset",
-                "hasOcr",
-                "hasOrigin",
-                "isAssetPartFor",
-                "isTranscodeFor",
-            ]:
-                continue
-            elif relation["type"].startswith("has"):
+        relations = [
+            (relation, is_created)
+            for relation, is_created in [
+                *[(relation, True) for relation in created],
+                *[(relation, False) for relation in deleted],
+            ]
+            if relation["type"] not in UNSYNCED_RELATION_TYPES
+        ]
+        related_documents = base_resource._get_related_documents(
+            [relation for relation, _ in relations]
+        )
+        reverse_relations = {}
+        for relation, is_created in relations:
+            collection, related_document = related_documents.get(
+                relation["key"], ("", {})
+            )
+            if relation["type"].startswith("has"):
                 related_type = relation["type"].removeprefix("has")
             else:
                 related_type = related_document.get("type", relation["type"])
@@ -321,62 +265,42 @@ class DamsConfiguration(ElodyConfiguration):
                 if relation["type"] != "isOcrFor"
                 else "hasOcr"
             )
-            if not related_document or related_type.lower() in [
-                "institution",
-                "license",
-                "photographer",
-                "tag",
-            ]:
+            if not related_document or related_type.lower() in UNSYNCED_RELATED_TYPES:
                 continue
 
-            if relation in created:
-                base_resource.storage.patch_item_from_collection_v2(
-                    collection,
-                    related_document,
-                    {
-                        "relations": [
-                            {
-                                **relation,
-                                "key": document["_id"],
-                                "type": reverse_relation_type,
-                            }
-                        ],
-                        "schema": related_document["schema"],
-                        "type": related_document["type"],
-                    },
-                    "dams",
-                    run_post_crud_hook=not g.get("dry_run"),
+            _, reverse_created, reverse_deleted = reverse_relations.setdefault(
+                (collection, related_document["_id"]), (related_document, [], [])
+            )
+            if is_created:
+                reverse_created.append(
+                    {**relation, "key": document["_id"], "type": reverse_relation_type}
                 )
-            elif relation in deleted and related_document.get("relations"):
-                new_related_document = deepcopy(related_document)
-                relation["key"] = document["_id"]
-                relation["type"] = reverse_relation_type
-                new_related_document["relations"] = [
-                    related_relation
-                    for related_relation in related_document["relations"]
-                    if related_relation["key"] != relation["key"]
-                    or related_relation["type"] != relation["type"]
-                ]
-                base_resource.storage.put_item_from_collection(
-                    collection,
-                    related_document,
-                    new_related_document,
-                    "dams",
-                    run_post_crud_hook=not g.get("dry_run"),
+            elif related_document.get("relations"):
+                reverse_deleted.append(
+                    {"key": document["_id"], "type": reverse_relation_type}
                 )
 
+        patches_per_collection = {}
+        for (collection, _), patch in reverse_relations.items():
+            patches_per_collection.setdefault(collection, []).append(patch)
+        for collection, patches in patches_per_collection.items():
+            base_resource._bulk_patch_relations(
+                collection, patches, run_post_crud_hook=not g.get("dry_run")
+            )
+
     def __sync_virtual_relations(
         self, document, crud=crud, unpatched_document={}, **kwargs
     ):
         for type in get_virtual_properties(document["type"]):
             created = [
-                deepcopy(relation)
-                for relation in document["relations"]
-                if relation["type"] == type
+                relation for relation in document["relations"] if relation["type"] == type
             ]
-            for relation in created:
-                document["relations"].remove(relation)
             if created:
+                document["relations"] = [
+                    relation
+                    for relation in document["relations"]
+                    if relation["type"] != type
+                ]
                 self.__sync_relations(
                     crud=crud,
                     document=document,
@@ -1,3 +1,5 @@
+from apps.podiumnet.object_configurations.util import invalidate_origin_redirects
+from apps.podiumnet.serializers.attribution import refresh_attributions
 from elody.object_configurations.elody_configuration import (
     ElodyConfiguration,
 )
@@ -24,4 +26,12 @@ class EntityConfiguration(ElodyConfiguration):
         return super().serialization(from_format, to_format)
 
     def validation(self):
-        return "schema", entity_schema
\ No newline at end of file
+        return "schema", entity_schema
+
+    def _post_crud_hook(self, *, crud=None, document=None, **kwargs):
+        if document:
+            invalidate_origin_redirects(
+                document, kwargs.get("unpatched_document") or {}
+            )
+        refresh_attributions(crud, document, kwargs.get("unpatched_document"))
+        return super()._post_crud_hook(crud=crud, document=document, **kwargs)
\ No newline at end of file
@@ -1,14 +1,15 @@
 from app_context import g, request  # pyright: ignore
+from apps.podiumnet.caches import asset_tenant_ids
 from apps.podiumnet.object_configurations.entity_configuration import (
     EntityConfiguration,
 )
+from apps.podiumnet.object_configurations.util import invalidate_origin_redirects
+from apps.podiumnet.resources.base_resource import PodiumnetBaseResource
 from apps.podiumnet.serializers.mediafile_serializer import MediafileSerializer
 from configuration import get_object_configuration_mapper  # pyright: ignore
 from copy import deepcopy
 from elody.util import flatten_dict, send_cloudevent
 from rabbit import get_rabbit  # pyright: ignore
-from resources.base_filter_resource import BaseFilterResource  # pyright: ignore
-from storage.storagemanager import StorageManager
 from uuid import uuid4
 
 
@@ -94,8 +95,11 @@ class MediafileConfiguration(EntityConfiguration):
         return [mediafile]
 
     def _post_crud_hook(self, *, crud, document, storage, **kwargs):
+        self.__invalidate_asset_tenant_ids(
+            document, kwargs.get("unpatched_document") or {}
+        )
         self.__generate_upload_link(crud, document)
-        self.__delete_derivatives(crud, document, storage)
+        self.__delete_derivatives(crud, document)
         super()._post_crud_hook(crud=crud, document=document, storage=storage, **kwargs)
         self.__delete_file_from_storage(crud, document)
 
@@ -104,6 +108,43 @@ class MediafileConfiguration(EntityConfiguration):
         document = self.__duplicate_is_mediafile_for_relations_to_ref_assets(document)
         return super()._pre_crud_hook(crud=crud, document=document, **kwargs)
 
+    def __cascade_delete_derivatives(self, base_resource, ids):
+        for derivatives in base_resource._cascade_delete(
+            self.crud()["collection"],
+            {
+                "type": "mediafile",
+                "relations": {
+                    "$elemMatch": {
+                        "key": {"$in": ids},
+                        "type": {
+                            "$in": ["isMediafileFor", "isOcrFor", "isTranscodeFor"]
+                        },
+                    }
+                },
+                "schema.type": "dams",
+                "schema.version": 1,
+            },
+            self.get_derivatives_query(*ids),
+            projection=[
+                "filename",
+                "identifiers",
+                "original_filename",
+                "relations",
+                "schema",
+                "technical_origin",
+                "type",
+            ],
+            run_post_crud_hook=False,
+        ):
+            self.__delete_has_mediafile_relations(base_resource, derivatives)
+            for derivative in derivatives:
+                self.__invalidate_asset_tenant_ids(derivative, {})
+                invalidate_origin_redirects(derivative, {})
+            yield from derivatives
+            yield from self.__cascade_delete_derivatives(
+                base_resource, [derivative["_id"] for derivative in derivatives]
+            )
+
     def __correct_document_metadata(self, crud, document):
         if document:
             if crud == "create":
@@ -112,22 +153,24 @@ class MediafileConfiguration(EntityConfiguration):
                 document["identifiers"].append(md5sum)
         return document
 
-    def __delete_derivatives(self, crud, document, storage):
-        if crud == "delete":
-            derivatives = (
-                BaseFilterResource()
-                ._execute_advanced_search_with_query_v2(
-                    self.get_derivatives_query(document["_id"]),
-                    self.crud()["collection"],
-                    limit=999999,
-                )
-                .get("results", [])
+    def __delete_derivatives(self, crud, document):
+        if crud != "delete":
+            return
+
+        serialize = self.serialization(self.SCHEMA_TYPE, "elody")
+        mediafiles = [
+            serialize(derivative)
+            for derivative in self.__cascade_delete_derivatives(
+                PodiumnetBaseResource(), [document["_id"]]
+            )
+        ]
+        if mediafiles:
+            send_cloudevent(
+                get_rabbit(),
+                "dams",
+                "dams.mediafiles_deleted",
+                {"mediafiles": mediafiles, "linked_entities": []},
             )
-            for derivative in derivatives:
-                derivative = storage.get_item_from_collection_by_id(
-                    self.crud()["collection"], derivative["_id"]
-                )
-                storage.delete_item(derivative)
 
     def __delete_file_from_storage(self, crud, document):
         if crud == "delete":
@@ -139,6 +182,34 @@ class MediafileConfiguration(EntityConfiguration):
                 {"mediafile": serialize(document), "linked_entities": []},
             )
 
+    def __delete_has_mediafile_relations(self, base_resource, derivatives):
+        deleted_relations = {}
+        for derivative in derivatives:
+            for relation in derivative.get("relations", []):
+                if relation["type"] == "isMediafileFor":
+                    deleted_relations.setdefault(relation["key"], set()).add(
+                        derivative["_id"]
+                    )
+        assets = base_resource._get_items_from_collection_by_ids(
+            "entities", deleted_relations.keys()
+        )
+        base_resource._bulk_patch_relations(
+            "entities",
+            [
+                (
+                    asset,
+                    [],
+                    [
+                        relation
+                        for relation in asset.get("relations", [])
+                        if relation["type"] == "hasMediafile"
+                        and relation["key"] in deleted_relations[id]
+                    ],
+                )
+                for id, asset in assets.items()
+            ],
+        )
+
     def __duplicate_is_mediafile_for_relations_to_ref_assets(self, document):
         if document.get("technical_origin") != "original":
             return document
@@ -156,6 +227,44 @@ class MediafileConfiguration(EntityConfiguration):
             uri = self.serialization(self.SCHEMA_TYPE, "texturilist")(document)
             g.text_uri_list = text_uri_list + "\n" + uri if text_uri_list else uri
 
+    def __get_asset_tenant_ids(self, asset_ids):
+        tenant_ids = {}
+        missing_asset_ids = []
+        for asset_id in asset_ids:
+            if (tenant_id := asset_tenant_ids.get(asset_id)) is not None:
+                tenant_ids[asset_id] = tenant_id
+            else:
+                missing_asset_ids.append(asset_id)
+        if not missing_asset_ids:
+            return tenant_ids
+
+        config = get_object_configuration_mapper().get("asset")
+        resolve_tenant_id = config.document_info()["tenant_id_resolver"]
+        assets = PodiumnetBaseResource()._get_items_from_collection_by_ids(
+            config.crud()["collection"],
+            [asset_id for asset_id in missing_asset_ids if asset_id],
+        )
+        for asset_id in missing_asset_ids:
+            if asset := assets.get(asset_id):
+                tenant_ids[asset_id] = asset_tenant_ids.set(
+                    asset_id, resolve_tenant_id(asset)
+                )
+            else:
+                tenant_ids[asset_id] = resolve_tenant_id({})
+        return tenant_ids
+
+    def __invalidate_asset_tenant_ids(self, document, unpatched_document):
+        asset_tenant_ids.invalidate(
+            *(
+                relation["key"]
+                for relation in [
+                    *(document or {}).get("relations", []),
+                    *unpatched_document.get("relations", []),
+                ]
+                if relation["type"] == "isMediafileFor"
+            )
+        )
+
     def __mutate_post_body(self, post_body):
         flat_post_body = flatten_dict(self.document_info()["object_lists"], post_body)
         post_body["_id"] = post_body.get("_id", str(uuid4()))
@@ -177,49 +286,43 @@ class MediafileConfiguration(EntityConfiguration):
         return post_body
 
     def __tenant_id_resolver(self, document):
-        flat_document = flatten_dict(self.document_info()["object_lists"], document)
-        asset_ids = flat_document.get("relations.isMediafileFor.key")
-        if not isinstance(asset_ids, list):
-            asset_ids = [asset_ids]
-
-        institution_ids = []
-        storage_manager = StorageManager()  # pyright: ignore
-        config = get_object_configuration_mapper().get("asset")
-        for asset_id in asset_ids:
-            asset = (
-                storage_manager.get_db_engine().get_item_from_collection_by_id(
-                    config.crud()["collection"], asset_id
-                )
-                or {}
-            )
-            resolve_tenant_id = config.document_info()["tenant_id_resolver"]
-            institution_ids.extend(resolve_tenant_id(asset).split(","))
-
-        return ",".join(institution_ids)
+        return self.resolve_tenant_ids([document])[0]
 
     @classmethod
-    def get_derivatives_query(cls, id):
+    def get_derivatives_query(cls, *ids):
         return [
             {"type": "type", "value": "mediafile"},
-            {
-                "type": "text",
-                "key": ["dams:1|relations.isMediafileFor.key"],
-                "value": id,
-                "match_exact": True,
-                "operator": "or",
-            },
-            {
-                "type": "text",
-                "key": ["dams:1|relations.isTranscodeFor.key"],
-                "value": id,
-                "match_exact": True,
-                "operator": "or",
-            },
-            {
-                "type": "text",
-                "key": ["dams:1|relations.isOcrFor.key"],
-                "value": id,
-                "match_exact": True,
-                "operator": "or",
-            },
+            *[
+                {
+                    "type": "text",
+                    "key": [f"dams:1|relations.{relation_type}.key"],
+                    "value": id,
+                    "match_exact": True,
+                    "operator": "or",
+                }
+                for id in ids
+                for relation_type in ["isMediafileFor", "isTranscodeFor", "isOcrFor"]
+            ],
+        ]
+
+    def resolve_tenant_ids(self, documents):
+        asset_ids_per_document = [
+            [
+                relation["key"]
+                for relation in document.get("relations", [])
+                if relation["type"] == "isMediafileFor"
+            ]
+            or [None]
+            for document in documents
+        ]
+        tenant_ids = self.__get_asset_tenant_ids(
+            dict.fromkeys(
+                asset_id
+                for asset_ids in asset_ids_per_document
+                for asset_id in asset_ids
+            )
+        )
+        return [
+            ",".join(tenant_ids[asset_id] for asset_id in asset_ids)
+            for asset_ids in asset_ids_per_document
         ]
@@ -0,0 +1,107 @@
+from apps.podiumnet.caches import origin_redirects
+
+ORDERED_RELATION_TYPES = ["hasAssetPart", "hasMediafile"]
+UNSYNCED_RELATED_TYPES = ["institution", "license", "photographer", "tag"]
+UNSYNCED_RELATION_TYPES = [
+    "hasAsset",
+    "hasOcr",
+    "hasOrigin",
+    "isAssetPartFor",
+    "isTranscodeFor",
+]
+
+
+def diff_relations(old_relations, new_relations):
+    old_relation_ids = {get_relation_id(relation) for relation in old_relations}
+    new_relation_ids = {get_relation_id(relation) for relation in new_relations}
+
+    added, unchanged = [], []
+    for relation in new_relations:
+        if get_relation_id(relation) in old_relation_ids:
+            unchanged.append(relation)
+        else:
+            added.append(relation)
+    removed = [
+        relation
+        for relation in old_relations
+        if get_relation_id(relation) not in new_relation_ids
+    ]
+    return added, removed, unchanged
+
+
+def get_relation_id(relation):
+    return relation["key"], relation["type"]
+
+
+def get_ordered_relation(relation, order):
+    return {
+        **relation,
+        "metadata": [
+            metadata
+            for metadata in relation.get("metadata", [])
+            if metadata["key"] != "order"
+        ]
+        + [{"key": "order", "value": order}],
+        "sort": {"order": [{"value": order}]},
+    }
+
+
+def invalidate_origin_redirects(document, unpatched_document):
+    origin_redirects.invalidate(
+        document["_id"],
+        *document.get("identifiers", []),
+        *[
+            relation["key"]
+            for relation in [
+                *document.get("relations", []),
+                *unpatched_document.get("relations", []),
+            ]
+            if relation["type"] == "hasOrigin"
+        ],
+    )
+
+
+def patch_metadata(metadata, patch):
+    keys = {value["key"] for value in patch}
+    return [value for value in metadata if value["key"] not in keys] + patch
+
+
+def patch_relations(relations, created, deleted):
+    patched_ids = {get_relation_id(relation) for relation in [*created, *deleted]}
+    return [
+        relation
+        for relation in relations
+        if get_relation_id(relation) not in patched_ids
+    ] + created
+
+
+def sort_relations(relations):
+    ordered_relations, unordered_relations = {}, []
+    for relation in relations:
+        if (
+            order := relation.get("sort", {}).get("order", [{}])[0].get("value")
+        ) is not None:
+            ordered_relations[str(order)] = relation
+        else:
+            unordered_relations.append(relation)
+
+    sorted_relations = [
+        relation
+        for _, relation in sorted(
+            (
+                (int(order), relation)
+                for order, relation in ordered_relations.items()
+                if order.isdigit()
+            ),
+            key=lambda item: item[0],
+        )
+    ]
+    sorted_relations.extend(unordered_relations)
+    sorted_relations.extend(
+        relation for order, relation in ordered_relations.items() if not order.isdigit()
+    )
+
+    return [
+        get_ordered_relation(relation, order)
+        for order, relation in enumerate(sorted_relations, start=1)
+    ]
@@ -0,0 +1,53 @@
+from elody.util import send_cloudevent
+from flask import after_this_request, g, has_request_context
+from os import getenv
+from rabbit import get_rabbit  # pyright: ignore
+
+
+class RabbitPublisher:
+    def publish(self, exchange, routing_key, messages):
+        rabbit = get_rabbit()
+        for message in messages:
+            send_cloudevent(rabbit, exchange, routing_key, message)
+
+
+class LocalPublisher:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, exchange, routing_key, messages):
+        self.published.extend(
+            (exchange, routing_key, message) for message in messages
+        )
+
+
+class Outbox:
+    def __init__(self, routing_key, *, exchange=None, publisher=None):
+        self.routing_key = routing_key
+        self.exchange = exchange
+        self.publisher = publisher or RabbitPublisher()
+
+    def add(self, message):
+        if not has_request_context():
+            return self.__publish([message])
+
+        outbox = g.setdefault("outbox", {})
+        if self.routing_key not in outbox:
+            outbox[self.routing_key] = []
+            after_this_request(self.__flush)
+        outbox[self.routing_key].append(message)
+
+    def __flush(self, response):
+        self.__publish(g.outbox.pop(self.routing_key, []))
+        return response
+
+    def __publish(self, messages):
+        if messages:
+            self.publisher.publish(
+                self.exchange or getenv("MQ_EXCHANGE", "dams"),
+                self.routing_key,
+                messages,
+            )
+
+
+history_outbox = Outbox("collection.document.history.create")
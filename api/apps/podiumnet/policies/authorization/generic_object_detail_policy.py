@@ -1,5 +1,6 @@
 import re as regex
 
+from apps.podiumnet.caches import RequestCachedStorageManager
 from elody.policies.permission_handler import (
     get_permissions,
     handle_single_item_request,
@@ -13,28 +14,28 @@ from inuits_policy_based_auth.contexts.policy_context import (  # pyright: ignor
 from inuits_policy_based_auth.contexts.user_context import (  # pyright: ignore
     UserContext,
 )
-from storage.storagemanager import StorageManager  # pyright: ignore
 
 
 class GenericObjectDetailPolicy(BaseAuthorizationPolicy):
+    __detail_path = regex.compile(
+        "^(/[^/]+/v[0-9]+)?/[^/]+/[^/]+$|^/ngsi-ld/v1/entities/[^/]+$"
+    )
+    __routes = {}
+    __storage = None
+
     def authorize(
         self, policy_context: PolicyContext, user_context: UserContext, request_context
     ):
         request: Request = request_context.http_request
-        if not regex.match(
-            "^(/[^/]+/v[0-9]+)?/[^/]+/[^/]+$|^/ngsi-ld/v1/entities/[^/]+$", request.path
-        ) or not regex.match(r"^(?!.*filter).*", request.path):
+        is_detail_route, collection = self.__classify_route(request)
+        if not is_detail_route or "filter" in request.path:
             return policy_context
 
         view_args = request.view_args or {}
-        collection = "entities"
-        if not request.path.startswith("/ngsi-ld/v1/entities"):
-            collection = request.path.split("/")[-2]
+        collection = collection or request.path.split("/")[-2]
         id = view_args.get("id")
-        item = (
-            StorageManager()
-            .get_db_engine()
-            .get_item_from_collection_by_id(view_args.get("collection", collection), id)
+        item = self.__get_storage().get_item_from_collection_by_id(
+            view_args.get("collection", collection), id
         )
         if not item:
             abort(
@@ -67,6 +68,29 @@ class GenericObjectDetailPolicy(BaseAuthorizationPolicy):
 
         return policy_context
 
+    def __classify_path(self, path):
+        if "filter" in path or not self.__detail_path.match(path):
+            return False, None
+        if path.startswith("/ngsi-ld/v1/entities"):
+            return True, "entities"
+        collection = path.split("/")[-2]
+        return True, None if collection.startswith("<") else collection
+
+    def __classify_route(self, request: Request):
+        url_rule = request.url_rule
+        if url_rule is None or "<path:" in url_rule.rule:
+            return self.__classify_path(request.path)
+        if url_rule.rule not in self.__routes:
+            self.__routes[url_rule.rule] = self.__classify_path(url_rule.rule)
+        return self.__routes[url_rule.rule]
+
+    def __get_storage(self):
+        if GenericObjectDetailPolicy.__storage is None:
+            GenericObjectDetailPolicy.__storage = (
+                RequestCachedStorageManager().get_db_engine()
+            )
+        return GenericObjectDetailPolicy.__storage
+
 
 class PostRequestRules:
     def apply(
@@ -1,16 +1,255 @@
 import os
 
+from apps.podiumnet.caches import asset_tenant_ids
+from apps.podiumnet.object_configurations.util import patch_metadata, patch_relations
+from configuration import get_object_configuration_mapper  # pyright: ignore
+from copy import deepcopy
+from datetime import datetime, timezone
+from elody.validator import validate_json
+from flask import Response, has_request_context, stream_with_context
+from flask_restful import abort
 from policy_factory import get_user_context
+from pymongo import ReplaceOne
+from resources.base_filter_resource import BaseFilterResource  # pyright: ignore
 from resources.base_resource import BaseResource
+from storage.mongostore import MongoStorageManager
 
 
 class PodiumnetBaseResource(BaseResource):
+    def _bulk_patch_metadata(self, collection, patches):
+        patches = [patch for patch in patches if patch[1]]
+        if not patches:
+            return
+        if not isinstance(self.storage, MongoStorageManager):
+            for item, metadata in patches:
+                self.storage.patch_item_from_collection_v2(
+                    collection,
+                    item,
+                    {
+                        "metadata": metadata,
+                        "schema": item["schema"],
+                        "type": item["type"],
+                    },
+                    "dams",
+                    run_post_crud_hook=False,
+                )
+            return
+
+        self.__bulk_write(
+            collection,
+            [
+                (
+                    item,
+                    {
+                        **item,
+                        "metadata": patch_metadata(item.get("metadata", []), metadata),
+                    },
+                )
+                for item, metadata in patches
+            ],
+        )
+
+    def _bulk_patch_relations(self, collection, patches, *, run_post_crud_hook=True):
+        patches = [patch for patch in patches if patch[1] or patch[2]]
+        if not isinstance(self.storage, MongoStorageManager):
+            return self.__patch_relations(collection, patches, run_post_crud_hook)
+
+        items = self.__bulk_write(
+            collection,
+            [
+                (
+                    item,
+                    {
+                        **item,
+                        "relations": patch_relations(
+                            item.get("relations", []), created, deleted
+                        ),
+                    },
+                )
+                for item, created, deleted in patches
+            ],
+        )
+        if run_post_crud_hook:
+            for updated_item, item in items:
+                self.__run_post_crud_hook("update", updated_item, item)
+
+    def _bulk_update(self, items_per_collection):
+        items_per_collection = {
+            collection: items
+            for collection, items in items_per_collection.items()
+            if items
+        }
+        for items in items_per_collection.values():
+            for _, document in items:
+                self.__validate(document)
+        if not isinstance(self.storage, MongoStorageManager):
+            for collection, items in items_per_collection.items():
+                for item, document in items:
+                    self.storage.put_item_from_collection(
+                        collection, item, document, "dams", run_post_crud_hook=False
+                    )
+            return
+
+        self.__run_in_transaction(
+            lambda session: [
+                self.__bulk_write(collection, items, session=session)
+                for collection, items in items_per_collection.items()
+            ]
+        )
+
+    def _cascade_delete(
+        self,
+        collection,
+        mongo_filter,
+        query,
+        *,
+        batch_size=500,
+        projection=None,
+        run_post_crud_hook=True,
+    ):
+        if not isinstance(self.storage, MongoStorageManager):
+            filter_resource, deleted_ids = BaseFilterResource(), set()
+            while items := filter_resource._execute_advanced_search_with_query_v2(
+                query, collection, limit=batch_size
+            ).get("results", []):
+                if deleted_ids & {item["_id"] for item in items}:
+                    break
+                for item in items:
+                    self.storage.delete_item(item)
+                deleted_ids = {item["_id"] for item in items}
+                yield items
+            return
+
+        batch = []
+        for item in self.storage.db[collection].find(
+            mongo_filter, projection, batch_size=batch_size
+        ):
+            batch.append(item)
+            if len(batch) == batch_size:
+                self.__delete_batch(collection, batch, run_post_crud_hook)
+                yield batch
+                batch = []
+        if batch:
+            self.__delete_batch(collection, batch, run_post_crud_hook)
+            yield batch
+
+    def _create_csv_stream_response(self, documents, document_type):
+        serialize = (
+            get_object_configuration_mapper()
+            .get(document_type)
+            .serialization("dams", "textcsvstream")
+        )
+        return Response(
+            stream_with_context(serialize(documents, document_type=document_type)),
+            mimetype="text/csv",
+        )
+
+    def _get_items_from_collection_by_ids(self, collection, ids):
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        if not isinstance(self.storage, MongoStorageManager):
+            return {
+                id: item
+                for id in ids
+                if (item := self.storage.get_item_from_collection_by_id(collection, id))
+            }
+
+        items_by_id, items_by_identifier = {}, {}
+        for item in self.storage.db[collection].find(
+            {"$or": [{"_id": {"$in": ids}}, {"identifiers": {"$in": ids}}]}
+        ):
+            items_by_id[item["_id"]] = item
+            for identifier in item.get("identifiers", []):
+                items_by_identifier.setdefault(identifier, item)
+        return {
+            id: item
+            for id in ids
+            if (item := items_by_id.get(id) or items_by_identifier.get(id))
+        }
+
+    def _get_related_documents(self, relations):
+        unresolved_keys = {
+            relation["key"]: collections
+            for relation in relations
+            if (collections := self._resolve_collections(id=relation["key"]))
+        }
+        related_documents = {}
+        while unresolved_keys:
+            keys_per_collection = {}
+            for key, collections in unresolved_keys.items():
+                keys_per_collection.setdefault(collections[0], []).append(key)
+            for collection, keys in keys_per_collection.items():
+                items = self._get_items_from_collection_by_ids(collection, keys)
+                for key in keys:
+                    if related_document := items.get(key):
+                        related_documents[key] = (collection, related_document)
+            unresolved_keys = {
+                key: collections[1:]
+                for key, collections in unresolved_keys.items()
+                if key not in related_documents and len(collections) > 1
+            }
+        return related_documents
+
     def _get_upload_bucket(self):
         return os.getenv("MINIO_BUCKET")
 
     def _get_upload_location(self, filename):
         return filename
 
+    def _iter_advanced_search_results(
+        self,
+        query,
+        collection,
+        page_size=500,
+        *,
+        skip=0,
+        limit=None,
+        order_by="_id",
+        asc=True,
+    ):
+        filter_resource = BaseFilterResource()
+        page_query = query
+        while limit is None or limit > 0:
+            results = filter_resource._execute_advanced_search_with_query_v2(
+                page_query,
+                collection,
+                skip=skip,
+                limit=page_size if limit is None else min(page_size, limit),
+                order_by=order_by,
+                asc=asc,
+            ).get("results", [])
+            yield from results
+            if len(results) < page_size:
+                break
+            if limit is not None:
+                limit -= len(results)
+            if order_by == "_id":
+                page_query = [
+                    *query,
+                    {
+                        "type": "number",
+                        "key": ["dams:1|_id"],
+                        "value": {"min" if asc else "max": results[-1]["_id"]},
+                    },
+                ]
+                skip = 0
+            else:
+                skip += len(results)
+
+    def _iter_items(self, collection, mongo_filter, query, *, batch_size=500):
+        if not isinstance(self.storage, MongoStorageManager):
+            items = self._iter_advanced_search_results(query, collection, batch_size)
+        else:
+            items = self.storage.db[collection].find(
+                mongo_filter, batch_size=batch_size
+            )
+        seen_ids = set()
+        for item in items:
+            if item["_id"] not in seen_ids:
+                seen_ids.add(item["_id"])
+                yield item
+
     # def __get_roles_per_tenant_from_idp(self):
     #     user_context = get_user_context()
     #     roles_per_tenant = {}
@@ -36,4 +275,120 @@ class PodiumnetBaseResource(BaseResource):
     # def _sync_roles_from_idp(self, user, roles_per_tenant):
     #     return super()._sync_roles_from_idp(
     #         user, self.__get_roles_per_tenant_from_idp()
-    #     )
\ No newline at end of file
+    #     )
+
+    def __bulk_write(self, collection, items, *, session=None):
+        audit_info = self.__get_audit_info()
+        items = [
+            (self.__run_pre_crud_hook({**deepcopy(document), **audit_info}, item), item)
+            for item, document in items
+        ]
+        if items:
+            self.storage.db[collection].bulk_write(
+                [
+                    ReplaceOne({"_id": item["_id"]}, document)
+                    for document, item in items
+                ],
+                ordered=False,
+                session=session,
+            )
+        asset_tenant_ids.invalidate(
+            *(
+                id
+                for document, _ in items
+                for id in [document["_id"], *document.get("identifiers", [])]
+            )
+        )
+        return items
+
+    def __delete_batch(self, collection, items, run_post_crud_hook):
+        self.storage.db[collection].delete_many(
+            {"_id": {"$in": [item["_id"] for item in items]}}
+        )
+        if run_post_crud_hook:
+            for item in items:
+                self.__run_post_crud_hook("delete", item)
+
+    def __get_audit_info(self):
+        return {
+            "date_updated": datetime.now(timezone.utc),
+            "last_editor": (has_request_context() and get_user_context().email)
+            or "default_uploader",
+        }
+
+    def __patch_relations(self, collection, patches, run_post_crud_hook):
+        for item, created, deleted in patches:
+            if created:
+                self.storage.patch_item_from_collection_v2(
+                    collection,
+                    item,
+                    {
+                        "relations": created,
+                        "schema": item["schema"],
+                        "type": item["type"],
+                    },
+                    "dams",
+                    run_post_crud_hook=run_post_crud_hook,
+                )
+            if deleted:
+                item = (
+                    self.storage.get_item_from_collection_by_id(collection, item["_id"])
+                    if created
+                    else item
+                )
+                deleted_ids = [
+                    (relation["key"], relation["type"]) for relation in deleted
+                ]
+                self.storage.put_item_from_collection(
+                    collection,
+                    item,
+                    {
+                        **item,
+                        "relations": [
+                            relation
+                            for relation in item.get("relations", [])
+                            if (relation["key"], relation["type"]) not in deleted_ids
+                        ],
+                    },
+                    "dams",
+                    run_post_crud_hook=run_post_crud_hook,
+                )
+
+    def __run_in_transaction(self, write):
+        client = self.storage.db.client
+        if client.topology_description.topology_type_name not in [
+            "ReplicaSetWithPrimary",
+            "Sharded",
+        ]:
+            return write(None)
+        with client.start_session() as session:
+            return session.with_transaction(write)
+
+    def __run_post_crud_hook(self, crud, item, unpatched_item={}):
+        if config := get_object_configuration_mapper().get(item["type"]):
+            config.crud()["post_crud_hook"](
+                crud=crud,
+                document=item,
+                storage=self.storage,
+                unpatched_document=unpatched_item,
+            )
+
+    def __run_pre_crud_hook(self, document, unpatched_document):
+        if config := get_object_configuration_mapper().get(document["type"]):
+            return config.crud()["pre_crud_hook"](
+                crud="update",
+                document=document,
+                unpatched_document=unpatched_document,
+            )
+        return document
+
+    def __validate(self, document):
+        if config := get_object_configuration_mapper().get(document["type"]):
+            strategy, validator = config.validation()
+            if strategy == "schema" and (
+                validation_error := validate_json(document, validator)
+            ):
+                abort(
+                    400,
+                    message=f"{document['type']} {document['_id']} doesn't have a valid format. {validation_error}",
+                )
@@ -1,9 +1,39 @@
+from apps.podiumnet.caches import (
+    ORIGIN_REDIRECT_NEGATIVE_CACHE_TTL,
+    RequestCachedStorage,
+    RequestCachedStorageManager,
+    origin_redirects,
+)
+from apps.podiumnet.object_configurations.util import (
+    ORDERED_RELATION_TYPES,
+    UNSYNCED_RELATED_TYPES,
+    UNSYNCED_RELATION_TYPES,
+    get_relation_id,
+    patch_metadata,
+    patch_relations,
+    sort_relations,
+)
 from apps.podiumnet.resources.base_resource import PodiumnetBaseResource
+from apps.podiumnet.serializers.attribution import (
+    is_attribution_query,
+    load_attribution_documents,
+)
+from apps.podiumnet.serializers.dams_serializer import DamsSerializer
+from apps.podiumnet.validation.util import get_virtual_properties
+from configuration import get_object_configuration_mapper  # pyright: ignore
 from elody.policies.helpers import get_item
+from elody.policies.permission_handler import (
+    get_permissions,
+    handle_single_item_request,
+)
 from flask import g, redirect, request, url_for
-from flask_restful import Headers
+from flask_restful import abort  # pyright: ignore
 from inuits_policy_based_auth import RequestContext
-from policy_factory import authenticate, get_user_context  # pyright: ignore
+from policy_factory import (  # pyright: ignore
+    apply_policies,
+    authenticate,
+    get_user_context,
+)
 from resources.elody._blueprint import api  # pyright: ignore
 from resources.elody.batch import ElodyBatch  # pyright: ignore
 from resources.elody.document import ElodyDocument  # pyright: ignore
@@ -15,9 +45,16 @@ from resources.elody.mediafiles.document_mediafiles import (  # pyright: ignore
 from resources.elody.mediafiles.mediafile_derivatives import (  # pyright: ignore
     ElodyMediafileDerivatives,
 )
+from resources.elody.mediafiles.mediafile_filter import (  # pyright: ignore
+    ElodyMediafileFilter,
+)
 from resources.generic_object import GenericObjectDetailV2  # pyright: ignore
-from serialization.case_converter import snake_to_camel  # pyright: ignore
-from storage.storagemanager import StorageManager
+from serialization.case_converter import (  # pyright: ignore
+    camel_to_snake,
+    snake_to_camel,
+)
+from storage.mongostore import MongoStorageManager
+from time import perf_counter
 from werkzeug.exceptions import NotFound
 
 
@@ -27,20 +64,31 @@ class ClientDocument(ElodyDocument):
         if request.args.get("soft", 0, int) and not request.args.get("key_to_check"):
             return "good", 200
 
+        self.storage = RequestCachedStorage(self.storage)
+
         try:
             get_item(
-                StorageManager(),  # pyright: ignore
+                RequestCachedStorageManager(),
                 get_user_context().bag,
                 request.view_args,
             )
         except NotFound:
-            if document := self.storage.db["origins"].find_one({"_id": id}):
-                return redirect(
-                    url_for("elody.clientdocument", id=document["elody_id"]), code=301
-                )
+            if elody_id := self.__get_origin_elody_id(id):
+                return redirect(url_for("elody.clientdocument", id=elody_id), code=301)
 
         return super().get(id=id, **kwargs)
 
+    def __get_origin_elody_id(self, id):
+        elody_id = origin_redirects.get(id)
+        if elody_id is None:
+            if origin := self.storage.db["origins"].find_one({"_id": id}):
+                elody_id = origin_redirects.set(id, origin["elody_id"])
+            else:
+                elody_id = origin_redirects.set(
+                    id, "", ttl=ORIGIN_REDIRECT_NEGATIVE_CACHE_TTL
+                )
+        return elody_id
+
 
 class ClientDocumentMediafiles(ElodyDocumentMediafiles):
     def get(self, **kwargs):
@@ -60,24 +108,256 @@ class ClientDocumentMediafiles(ElodyDocumentMediafiles):
 
 
 class ClientDocumentRelationsOrder(PodiumnetBaseResource, GenericObjectDetailV2):
-    def get(self, id, **kwargs):
+    @authenticate(RequestContext(request))
+    def get(self, id, **_):
         document_type = request.args.get("return_type")
+        document = self.storage.get_item_from_collection_by_id("entities", id) or {}
         request.method = "POST"
         request.path = "/entities/filter"
-        request.headers = Headers({**request.headers, "Accept": "text/csv"})
         g.content = [
             {"type": "type", "value": document_type},
             {
                 "type": "text",
-                "key": f"relations.{snake_to_camel(f'is_{document_type}_for')}.key",
+                "key": [
+                    f"dams:1|relations.{snake_to_camel(f'is_{document_type}_for')}.key"
+                ],
                 "value": id,
                 "match_exact": True,
             },
         ]
         g.enable_parsers = True
-        return ElodyFilter().post(**kwargs)
+        return self.__get_csv_stream(document, document_type)
 
     def post(self, **kwargs):
+        document = None
+        if isinstance(self.storage, MongoStorageManager) and not g.get("dry_run"):
+            document = self.storage.get_item_from_collection_by_id(
+                "entities", kwargs["id"]
+            )
+        if not document or request.mimetype != "text/csv":
+            return self.__post_batch(**kwargs)
+        return self.__post_sheet(document, **kwargs)
+
+    def __abort_if_not_allowed(self, items_per_collection):
+        user_context = get_user_context()
+        for items in items_per_collection.values():
+            for item, updated_item in items:
+                if not any(
+                    (permissions := get_permissions(role, user_context))
+                    and handle_single_item_request(
+                        user_context, item, permissions, "update", updated_item
+                    )
+                    for role in user_context.x_tenant.roles
+                ):
+                    abort(
+                        403,
+                        message=f"Not allowed to update {item['type']} {item['_id']}",
+                    )
+
+    def __add_server_timing(self, response, timings):
+        server_timing = ", ".join(
+            f"{phase};dur={duration * 1000:.1f}" for phase, duration in timings.items()
+        )
+        if isinstance(response, tuple):
+            body, status_code, *headers = response
+            return (
+                body,
+                status_code,
+                {**(headers[0] if headers else {}), "Server-Timing": server_timing},
+            )
+        response.headers["Server-Timing"] = server_timing
+        return response
+
+    @apply_policies(RequestContext(request))
+    def __get_csv_stream(self, document, document_type):
+        relation_type = snake_to_camel(f"has_{document_type}")
+        return self._create_csv_stream_response(
+            self.__iter_children(
+                [
+                    *g.content,
+                    *(get_user_context().access_restrictions.filters or []),
+                ],
+                list(
+                    dict.fromkeys(
+                        relation["key"]
+                        for relation in document.get("relations", [])
+                        if relation["type"] == relation_type
+                    )
+                ),
+            ),
+            document_type,
+        )
+
+    def __get_updated_items(
+        self, document, stored_relations, children, patches_per_collection
+    ):
+        items = {
+            ("entities", document["_id"]): (
+                document,
+                {**document, "relations": stored_relations},
+            )
+        }
+        for collection, child, row in children:
+            item, updated_item = items.get((collection, child["_id"]), (child, child))
+            items[(collection, child["_id"])] = (
+                item,
+                {
+                    **updated_item,
+                    "metadata": patch_metadata(
+                        updated_item.get("metadata", []), row["metadata"]
+                    ),
+                },
+            )
+        for collection, patches in patches_per_collection.items():
+            for child, created, deleted in patches:
+                item, updated_item = items.get(
+                    (collection, child["_id"]), (child, child)
+                )
+                items[(collection, child["_id"])] = (
+                    item,
+                    {
+                        **updated_item,
+                        "relations": patch_relations(
+                            updated_item.get("relations", []), created, deleted
+                        ),
+                    },
+                )
+
+        items_per_collection = {}
+        for (collection, _), (item, updated_item) in items.items():
+            if updated_item != item:
+                items_per_collection.setdefault(collection, []).append(
+                    (item, updated_item)
+                )
+        return items_per_collection
+
+    def __has_new_relations(self, children):
+        for _, child, row in children:
+            relation_ids = {
+                get_relation_id(relation) for relation in child.get("relations", [])
+            }
+            if any(
+                get_relation_id(relation) not in relation_ids
+                for relation in row["relations"]
+            ):
+                return True
+        return False
+
+    def __iter_children(self, query, keys, batch_size=500):
+        seen_ids = set()
+        for index in range(0, len(keys), batch_size):
+            batch = keys[index : index + batch_size]
+            children = {}
+            for child in self._iter_advanced_search_results(
+                [
+                    *query,
+                    *[
+                        {
+                            "type": "text",
+                            "key": ["dams:1|identifiers"],
+                            "value": key,
+                            "match_exact": True,
+                            "operator": "or",
+                        }
+                        for key in batch
+                    ],
+                ],
+                "entities",
+                batch_size,
+            ):
+                for key in [child["_id"], *child.get("identifiers", [])]:
+                    children[key] = child
+            for key in batch:
+                if (child := children.get(key)) and child["_id"] not in seen_ids:
+                    seen_ids.add(child["_id"])
+                    yield child
+
+    def __order_relations(self, document, relations):
+        current_relations = {
+            get_relation_id(relation): relation
+            for relation in document.get("relations", [])
+        }
+        sheet_relations = {
+            get_relation_id(relation): relation for relation in relations
+        }
+        virtual_types = get_virtual_properties(document["type"])
+        sheet_types = {type for _, type in sheet_relations}
+        ordered_relations, changed_relations = [], []
+        stored_relations = [
+            relation
+            for relation in document.get("relations", [])
+            if relation["type"] not in sheet_types
+        ]
+        for type in dict.fromkeys(type for _, type in sheet_relations):
+            type_relations = [
+                relation
+                for id, relation in current_relations.items()
+                if id[1] == type and id not in sheet_relations
+            ] + [relation for id, relation in sheet_relations.items() if id[1] == type]
+            is_sorted = type in ORDERED_RELATION_TYPES and all(
+                relation.get("sort") is not None for relation in type_relations
+            )
+            if is_sorted:
+                type_relations = sort_relations(type_relations)
+            for relation in type_relations:
+                current_relation = current_relations.get(get_relation_id(relation))
+                ordered_relations.append(relation)
+                if type not in virtual_types:
+                    stored_relations.append(relation)
+                if current_relation is None or (
+                    is_sorted and relation != current_relation
+                ):
+                    changed_relations.append(relation)
+
+        patches_per_collection = {}
+        changed_relations = [
+            relation
+            for relation in changed_relations
+            if relation["type"] not in UNSYNCED_RELATION_TYPES
+            and relation["type"].removeprefix("has").lower()
+            not in UNSYNCED_RELATED_TYPES
+        ]
+        related_documents = self._get_related_documents(changed_relations)
+        for relation in changed_relations:
+            if relation["key"] not in related_documents:
+                continue
+            collection, related_document = related_documents[relation["key"]]
+            related_type = relation["type"].removeprefix("has")
+            reverse_relation = {
+                **relation,
+                "key": document["_id"],
+                "type": snake_to_camel(
+                    camel_to_snake(f"is{related_type[0].upper() + related_type[1:]}For")
+                ),
+            }
+            patches_per_collection.setdefault(collection, []).append(
+                (related_document, [reverse_relation], [])
+            )
+        return ordered_relations, stored_relations, patches_per_collection
+
+    def __parse_sheet(self):
+        g.enable_parsers = True
+        rows = list(
+            DamsSerializer().from_textcsv_to_dams(request.get_data(), document_type="")
+        )
+        if exceptions := [
+            str(exception) for row in rows for exception in row.get("exceptions", [])
+        ]:
+            abort(400, message=exceptions)
+
+        related_documents = self._get_related_documents(
+            [{"key": row["identifiers"][0]} for row in rows if row["identifiers"]]
+        )
+        children = []
+        for row in rows:
+            id = next(iter(row["identifiers"]), "")
+            if id not in related_documents:
+                abort(404, message=f"{row['type']} {id} doesn't exist")
+            collection, child = related_documents[id]
+            children.append((collection, child, row))
+        return children
+
+    def __post_batch(self, **kwargs):
         response, status_code = ElodyBatch().post(force_patch_only=True, **kwargs)
         if status_code != 200:
             return response, status_code
@@ -93,6 +373,108 @@ class ClientDocumentRelationsOrder(PodiumnetBaseResource, GenericObjectDetailV2)
         ]
         return ElodyDocumentRelations().post(**kwargs)
 
+    @apply_policies(RequestContext(request))
+    def __post_sheet(self, document, **kwargs):
+        timings = {}
+        started_at = perf_counter()
+        children = self.__parse_sheet()
+        if self.__has_new_relations(children):
+            return self.__post_batch(**kwargs)
+        timings["parse"] = perf_counter() - started_at
+
+        started_at = perf_counter()
+        ordered_relations, stored_relations, patches_per_collection = (
+            self.__order_relations(
+                document,
+                [
+                    {
+                        "key": child["_id"],
+                        "sort": {},
+                        "type": snake_to_camel(f"has_{child['type']}"),
+                    }
+                    for _, child, _ in children
+                ],
+            )
+        )
+        items_per_collection = self.__get_updated_items(
+            document, stored_relations, children, patches_per_collection
+        )
+        self.__abort_if_not_allowed(items_per_collection)
+        timings["order"] = perf_counter() - started_at
+
+        started_at = perf_counter()
+        self._bulk_update(items_per_collection)
+        timings["write"] = perf_counter() - started_at
+
+        started_at = perf_counter()
+        self.__run_post_crud_hooks(
+            {
+                collection: [item for item, _ in items]
+                for collection, items in items_per_collection.items()
+            }
+        )
+        timings["hooks"] = perf_counter() - started_at
+        return self.__add_server_timing((ordered_relations, 201), timings)
+
+    def __run_post_crud_hooks(self, items_per_collection):
+        for collection, items in items_per_collection.items():
+            updated_items = self._get_items_from_collection_by_ids(
+                collection, [item["_id"] for item in items]
+            )
+            for item in items:
+                if not (updated_item := updated_items.get(item["_id"])):
+                    continue
+                if config := get_object_configuration_mapper().get(item["type"]):
+                    config.crud()["post_crud_hook"](
+                        crud="update",
+                        document=updated_item,
+                        storage=self.storage,
+                        unpatched_document=item,
+                        created=[],
+                        deleted=[],
+                    )
+
+
+class ClientFilter(PodiumnetBaseResource, ElodyFilter):
+    def post(self, **kwargs):
+        query = g.get("content") or request.get_json(silent=True) or []
+        document_types = [
+            filter["value"] for filter in query if filter["type"] == "type"
+        ]
+        if (
+            request.accept_mimetypes.best_match(["application/json", "text/csv"])
+            != "text/csv"
+            or len(document_types) != 1
+            or not isinstance(document_types[0], str)
+        ):
+            return super().post(**kwargs)
+        return self.__post_csv_stream(query, document_types[0])
+
+    @apply_policies(RequestContext(request))
+    def __post_csv_stream(self, query, document_type):
+        return self._create_csv_stream_response(
+            self._iter_advanced_search_results(
+                query,
+                "entities",
+                skip=request.args.get("skip", 0, int),
+                limit=request.args.get("limit", type=int),
+                order_by=request.args.get("order_by", "_id"),
+                asc=bool(request.args.get("asc", 1, int)),
+            ),
+            document_type,
+        )
+
+
+class ClientMediafileFilter(ElodyMediafileFilter):
+    def _execute_advanced_search_with_query_v2(self, query, *args, **kwargs):
+        items = super()._execute_advanced_search_with_query_v2(query, *args, **kwargs)
+        get_object_configuration_mapper().get("mediafile").resolve_tenant_ids(
+            items.get("results", [])
+        )
+        if is_attribution_query(query):
+            load_attribution_documents(items.get("results", []))
+        return items
+
 
 class ClientMediafileDerivatives(ElodyMediafileDerivatives):
     def post(self, **kwargs):
@@ -107,6 +489,7 @@ class ClientMediafileDerivatives(ElodyMediafileDerivatives):
 def resource_rules():
     return [
         {"route": "/entities/<string:id>", "resource": ClientDocument, "api": api},
+        {"route": "/entities/filter", "resource": ClientFilter, "api": api},
         {
             "route": "/entities/<string:id>/mediafiles",
             "resource": ClientDocumentMediafiles,
@@ -117,6 +500,7 @@ def resource_rules():
             "resource": ClientDocumentRelationsOrder,
             "api": api,
         },
+        {"route": "/mediafiles/filter", "resource": ClientMediafileFilter, "api": api},
         {
             "route": "/mediafiles/<string:id>/derivatives",
             "resource": ClientMediafileDerivatives,
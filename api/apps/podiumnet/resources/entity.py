@@ -1,4 +1,8 @@
+import click
+
 from apps.podiumnet.resources.base_resource import PodiumnetBaseResource
+from apps.podiumnet.serializers.attribution import backfill_attributions
+from apps.podiumnet.serializers.util import check_parsers
 from flask import Blueprint, request
 from flask_restful import Api
 from inuits_policy_based_auth import RequestContext
@@ -6,6 +10,7 @@ from policy_factory import apply_policies
 from resources.entity import Entity, EntityMediafiles, EntityDetail
 
 api_bp = Blueprint("entity", __name__)
+api_bp.record_once(lambda _: check_parsers())
 api = Api(api_bp)
 
 
@@ -43,6 +48,16 @@ class PodiumnetMediafileCopyright(PodiumnetBaseResource):
             return "good", 200
         return True, 200
 
+
+@api_bp.cli.command("backfill-attributions")
+@click.option("--batch-size", default=500, show_default=True)
+def backfill_attributions_command(batch_size):
+    updated_count, failed_count = backfill_attributions(batch_size=batch_size)
+    click.echo(f"Updated attributions of {updated_count} mediafiles")
+    if failed_count:
+        click.echo(f"Failed to compute attributions of {failed_count} mediafiles")
+
+
 api.add_resource(PodiumnetEntity, "/entities")
 api.add_resource(PodiumnetEntityDetail, "/entities/<string:id>")
 api.add_resource(PodiumnetMediafileCopyright, "/mediafiles/<string:id>/copyright")
@@ -0,0 +1,363 @@
+from app_context import g  # pyright: ignore
+from apps.podiumnet.resources.base_resource import PodiumnetBaseResource
+from configuration import get_object_configuration_mapper  # pyright: ignore
+from elody.util import flatten_dict
+from flask import after_this_request, has_request_context
+from itertools import chain, islice
+from logging import getLogger
+
+__ATTRIBUTION_KEYS = ["attribution", "minimal_attribution"]
+__LOGGER = getLogger(__name__)
+__ATTRIBUTION_PROPERTIES = {
+    "asset": [
+        "metadata.creator.value",
+        "metadata.identifier.value",
+        "metadata.title.value",
+        "relations.hasInstitution.key",
+    ],
+    "institution": ["metadata.name.value", "metadata.source_listing_name.value"],
+    "photographer": ["metadata.name.value"],
+}
+
+
+def backfill_attributions(*, batch_size=500):
+    collection = get_object_configuration_mapper().get("mediafile").crud()["collection"]
+    return materialize_attributions(
+        PodiumnetBaseResource()._iter_items(
+            collection,
+            {"type": "mediafile"},
+            [{"type": "type", "value": "mediafile"}],
+            batch_size=batch_size,
+        ),
+        batch_size=batch_size,
+    )
+
+
+def get_attribution_metadata(document, flat_document, attribution_documents=None):
+    if attribution_documents is None:
+        attribution_documents = __get_attribution_documents()
+    flat_asset_document = __get_related_flat_document(
+        flat_document.get("relations.isMediafileFor.key"),
+        "asset",
+        attribution_documents,
+    )
+    institution_values = __get_property_from_related_document(
+        ["metadata.source_listing_name.value", "metadata.name.value"],
+        flat_asset_document.get("relations.hasInstitution.key"),
+        "institution",
+        attribution_documents,
+    )
+    photographers_metadata_value = __get_property_from_related_document(
+        ["metadata.name.value"],
+        flat_document.get("relations.hasPhotographer.key"),
+        "photographer",
+        attribution_documents,
+    )
+    photographers_value = (
+        f"foto: {'; '.join(photographers_metadata_value)}"
+        if photographers_metadata_value
+        else ""
+    )
+
+    return [
+        {
+            "key": "minimal_attribution",
+            "value": flat_document.get(
+                "metadata.minimal_attribution_overwrite.value",
+                ", ".join(
+                    [
+                        value
+                        for value in [*institution_values, photographers_value]
+                        if value
+                    ]
+                ),
+            ),
+        },
+        {
+            "key": "attribution",
+            "value": flat_document.get(
+                "metadata.attribution_overwrite.value",
+                ", ".join(
+                    [
+                        value
+                        for value in [
+                            *__as_list(flat_asset_document, "metadata.creator.value"),
+                            *__as_list(flat_asset_document, "metadata.title.value"),
+                            flat_asset_document.get("metadata.identifier.value"),
+                            *institution_values,
+                            photographers_value,
+                        ]
+                        if value
+                    ]
+                ),
+            ),
+        },
+    ]
+
+
+def has_attribution_metadata(document):
+    return any(
+        metadata["key"] in __ATTRIBUTION_KEYS
+        for metadata in document.get("metadata", [])
+    )
+
+
+def is_attribution_query(query):
+    return any(
+        filter
+        for filter in query or []
+        if "relations.isMediafileFor.key" in str(filter.get("key", ""))
+    )
+
+
+def load_attribution_documents(documents, attribution_documents=None):
+    if attribution_documents is None:
+        attribution_documents = __get_attribution_documents()
+    assets = __load_related_documents(
+        "asset",
+        __get_relation_keys(documents, "isMediafileFor"),
+        attribution_documents,
+    )
+    __load_related_documents(
+        "institution",
+        __get_relation_keys(assets, "hasInstitution"),
+        attribution_documents,
+    )
+    __load_related_documents(
+        "photographer",
+        __get_relation_keys(documents, "hasPhotographer"),
+        attribution_documents,
+    )
+
+
+def materialize_attributions(mediafiles, *, batch_size=500):
+    base_resource = PodiumnetBaseResource()
+    collection = get_object_configuration_mapper().get("mediafile").crud()["collection"]
+    updated_count = failed_count = 0
+    mediafiles = iter(mediafiles)
+    while batch := list(islice(mediafiles, batch_size)):
+        attribution_documents = {}
+        load_attribution_documents(batch, attribution_documents)
+        patches = []
+        for mediafile in batch:
+            try:
+                metadata = get_attribution_metadata(
+                    mediafile, __flatten_document(mediafile), attribution_documents
+                )
+            except Exception:
+                __LOGGER.exception(
+                    "Could not compute the attributions of mediafile %s",
+                    mediafile.get("_id"),
+                )
+                failed_count += 1
+                continue
+            if __get_attribution_values(mediafile.get("metadata", [])) != (
+                __get_attribution_values(metadata)
+            ):
+                patches.append((mediafile, metadata))
+                mediafile["metadata"] = (
+                    remove_attribution_metadata(mediafile.get("metadata", []))
+                    + metadata
+                )
+        base_resource._bulk_patch_metadata(collection, patches)
+        updated_count += len(patches)
+    return updated_count, failed_count
+
+
+def refresh_attributions(crud, document, unpatched_document=None):
+    if not document or g.get("dry_run"):
+        return
+
+    document_type = document.get("type")
+    if document_type == "mediafile":
+        if crud != "delete":
+            __schedule_refresh("_id", [document["_id"]])
+        return
+    if document_type not in __ATTRIBUTION_PROPERTIES:
+        return
+    if crud != "delete" and not __has_attribution_changes(
+        document, unpatched_document or {}
+    ):
+        return
+
+    relation_type = {
+        "asset": "isMediafileFor",
+        "institution": "hasInstitution",
+        "photographer": "hasPhotographer",
+    }[document_type]
+    __schedule_refresh(
+        relation_type, [document["_id"], *document.get("identifiers", [])]
+    )
+
+
+def remove_attribution_metadata(metadata):
+    return [value for value in metadata if value["key"] not in __ATTRIBUTION_KEYS]
+
+
+def __as_list(flat_document, flat_property):
+    value = flat_document.get(flat_property)
+    if isinstance(value, list):
+        return value
+    return [flat_document.get(flat_property, "")]
+
+
+def __flatten_document(document):
+    config = get_object_configuration_mapper().get(document["type"])
+    return flatten_dict(config.document_info()["object_lists"], document)
+
+
+def __get_attribution_documents():
+    if g.get("attribution_documents") is None:
+        g.attribution_documents = {}
+    return g.attribution_documents
+
+
+def __get_attribution_values(metadata):
+    return {
+        value["key"]: value["value"]
+        for value in metadata
+        if value["key"] in __ATTRIBUTION_KEYS
+    }
+
+
+def __get_property_from_related_document(
+    flat_properties, document_id, document_type, attribution_documents
+):
+    if not document_id or not document_type:
+        return []
+    related_flat_document = __get_related_flat_document(
+        document_id, document_type, attribution_documents
+    )
+    return [
+        related_flat_document.get(flat_property, "")
+        for flat_property in flat_properties
+    ]
+
+
+def __get_related_flat_document(document_id, document_type, attribution_documents):
+    if not isinstance(document_id, str):
+        return {}
+    __load_related_documents(document_type, [document_id], attribution_documents)
+    return attribution_documents[(document_type, document_id)][1]
+
+
+def __get_relation_filter(relation_type, keys):
+    return {"relations": {"$elemMatch": {"type": relation_type, "key": {"$in": keys}}}}
+
+
+def __get_relation_keys(documents, relation_type):
+    return [
+        relation["key"]
+        for document in documents
+        for relation in document.get("relations", [])
+        if relation["type"] == relation_type
+    ]
+
+
+def __get_relation_query(relation_type, keys):
+    return [
+        {
+            "type": "text",
+            "key": [f"dams:1|relations.{relation_type}.key"],
+            "value": key,
+            "match_exact": True,
+            "operator": "or",
+        }
+        for key in keys
+    ]
+
+
+def __has_attribution_changes(document, unpatched_document):
+    if not unpatched_document:
+        return True
+    flat_document = __flatten_document(document)
+    flat_unpatched_document = __flatten_document(unpatched_document)
+    return any(
+        flat_document.get(flat_property) != flat_unpatched_document.get(flat_property)
+        for flat_property in __ATTRIBUTION_PROPERTIES[document["type"]]
+    )
+
+
+def __load_related_documents(document_type, document_ids, attribution_documents):
+    missing_ids = [
+        document_id
+        for document_id in dict.fromkeys(document_ids)
+        if document_id and (document_type, document_id) not in attribution_documents
+    ]
+    if missing_ids:
+        config = get_object_configuration_mapper().get(document_type)
+        object_lists = config.document_info()["object_lists"]
+        documents = PodiumnetBaseResource()._get_items_from_collection_by_ids(
+            config.crud()["collection"], missing_ids
+        )
+        for document_id in missing_ids:
+            document = documents.get(document_id, {})
+            attribution_documents[(document_type, document_id)] = (
+                document,
+                flatten_dict(object_lists, document),
+            )
+
+    return [
+        attribution_documents[(document_type, document_id)][0]
+        for document_id in document_ids
+        if document_id and (document_type, document_id) in attribution_documents
+    ]
+
+
+def __refresh(keys_per_type):
+    base_resource = PodiumnetBaseResource()
+    collection = get_object_configuration_mapper().get("mediafile").crud()["collection"]
+    if institution_keys := keys_per_type.pop("hasInstitution", None):
+        assets = base_resource._iter_items(
+            get_object_configuration_mapper().get("asset").crud()["collection"],
+            __get_relation_filter("hasInstitution", institution_keys),
+            __get_relation_query("hasInstitution", institution_keys),
+        )
+        keys_per_type.setdefault("isMediafileFor", []).extend(
+            key
+            for asset in assets
+            for key in [asset["_id"], *asset.get("identifiers", [])]
+        )
+
+    mediafiles = []
+    if ids := keys_per_type.pop("_id", None):
+        mediafiles.append(
+            base_resource._get_items_from_collection_by_ids(collection, ids).values()
+        )
+    for relation_type, keys in keys_per_type.items():
+        if keys:
+            mediafiles.append(
+                base_resource._iter_items(
+                    collection,
+                    __get_relation_filter(relation_type, keys),
+                    __get_relation_query(relation_type, keys),
+                )
+            )
+    materialize_attributions(__unique_documents(chain(*mediafiles)))
+
+
+def __flush_refreshes(response):
+    keys_per_type, g.attribution_refreshes = g.attribution_refreshes, None
+    try:
+        __refresh(keys_per_type)
+    except Exception:
+        __LOGGER.exception("Could not refresh attributions after the request")
+    return response
+
+
+def __schedule_refresh(relation_type, keys):
+    if not has_request_context():
+        return __refresh({relation_type: list(keys)})
+
+    if g.get("attribution_refreshes") is None:
+        g.attribution_refreshes = {}
+        after_this_request(__flush_refreshes)
+    g.attribution_refreshes.setdefault(relation_type, []).extend(keys)
+
+
+def __unique_documents(documents):
+    seen_ids = set()
+    for document in documents:
+        if document["_id"] not in seen_ids:
+            seen_ids.add(document["_id"])
+            yield document
@@ -11,9 +11,9 @@ from apps.podiumnet.serializers.util import (
     is_readonly,
     is_required_property,
 )
-from copy import deepcopy
+from csv import Sniffer
 from elody.error_codes import ErrorCode, get_error_code, get_read, get_write
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 from pandas import DataFrame, read_csv
 from requests.exceptions import HTTPError
 from serialization.case_converter import camel_to_snake  # pyright: ignore
@@ -26,7 +26,7 @@ class DamsSerializer:
             return {}
 
         serialized_document = {
-            **deepcopy(document),
+            **document,
             "schema": {"type": "elody", "version": 1},
         }
         document_keys = list(serialized_document.keys())
@@ -41,7 +41,7 @@ class DamsSerializer:
 
         property_value_map = get_property_value_map(document["type"])
         serialized_document = {
-            **deepcopy(document),
+            **document,
             "metadata": [],
             "relations": [],
             "schema": {"type": "dams", "version": 1},
@@ -69,103 +69,83 @@ class DamsSerializer:
         data_frame = self._parse_dams_to_dataframe(documents, document_type)
         return data_frame.to_csv(index=False)
 
+    def from_dams_to_textcsvstream(
+        self, documents, *, document_type, chunk_size=500, **_
+    ):
+        columns = self.__get_export_columns(document_type)
+        yield DataFrame(columns=columns).to_csv(index=False)
+
+        chunk = []
+        for document in documents:
+            chunk.append(document)
+            if len(chunk) == chunk_size:
+                yield self.__to_csv_rows(chunk, document_type, columns)
+                chunk = []
+        if chunk:
+            yield self.__to_csv_rows(chunk, document_type, columns)
+
     def from_textcsv_to_dams(self, data, *, document_type, **_):
         property_value_map = get_property_value_map(document_type)
 
-        skip = 0
-        limit = 500
-        while True:
-            data_frame = read_csv(
-                BytesIO(data),
-                sep=None,
-                engine="python",
-                na_filter=False,
-                skiprows=list(range(1, skip + 1)),
-                nrows=limit,
-            )
-            if data_frame.empty:
-                break
-            for row in data_frame.itertuples(index=False):
-                yield self._parse_dataframe_to_dams(
-                    data_frame.columns, row, document_type, property_value_map
-                )
-            skip += limit
+        with read_csv(
+            BytesIO(data),
+            sep=self.__sniff_delimiter(data),
+            engine="python",
+            na_filter=False,
+            chunksize=500,
+        ) as data_frames:
+            for data_frame in data_frames:
+                for row in data_frame.itertuples(index=False):
+                    yield self._parse_dataframe_to_dams(
+                        data_frame.columns, row, document_type, property_value_map
+                    )
 
         return []
 
-    def _parse_dams_to_dataframe(self, documents, document_type):
-        property_value_map = get_property_value_map(document_type)
-        properties = get_user_requested_properties(property_value_map)
+    def _parse_dams_to_dataframe(self, documents, document_type, dtype=None):
+        properties = self.__get_export_properties(document_type)
         data = []
 
         for document in documents:
+            metadata_values, relation_keys = self.__index_document(document)
             base_frame_data = {"type": document_type}
-            for property in properties:
-                if is_required_property(property, document_type) or (
-                    document_type == "mediafile" and property == "file_identifier"
-                ):  # this ugly hardcoded condition is temporary until data format change
-                    parse = get_parser_reverse(property, property_value_map)
-                    for alias in get_aliases(property, property_value_map):
+            for property in properties.values():
+                if property["required"]:
+                    for alias in property["aliases"]:
                         value = (
-                            [
-                                metadata["value"]
-                                for metadata in document["metadata"]
-                                if metadata["key"] == property
-                            ]
-                            + [
-                                relation["key"]
-                                for relation in document["relations"]
-                                if relation["type"] == property
-                            ]
+                            metadata_values.get(property["name"], [])
+                            + relation_keys.get(property["name"], [])
                         )[0]
                         if not base_frame_data.get(alias):
-                            base_frame_data.update({alias: parse(value)})
+                            base_frame_data.update({alias: property["parse"](value)})
 
             frame_data = {}
-            for property in properties:
-                if (
-                    camel_to_snake(property).startswith("has_")
-                    or (
-                        camel_to_snake(property).startswith("is_")
-                        and camel_to_snake(property).endswith("_for")
-                    )
-                    or not is_exportable(property, property_value_map)
-                ):
+            for property in properties.values():
+                if property["relation"] or not property["exportable"]:
                     continue
-                parse = get_parser_reverse(property, property_value_map)
-                for alias in get_aliases(property, property_value_map):
-                    values = [
-                        metadata["value"]
-                        for metadata in document["metadata"]
-                        if metadata["key"] == property
-                    ]
+                values = metadata_values.get(property["name"], [])
+                for alias in property["aliases"]:
                     if not base_frame_data.get(alias) and not frame_data.get(alias):
-                        frame_data.update({alias: parse(values[0]) if values else ""})
+                        frame_data.update(
+                            {alias: property["parse"](values[0]) if values else ""}
+                        )
 
             multi_ref_properties = []
-            for property in properties:
+            for property in properties.values():
                 if (
-                    not camel_to_snake(property).startswith("has_")
-                    and not (
-                        camel_to_snake(property).startswith("is_")
-                        and camel_to_snake(property).endswith("_for")
-                    )
-                    or property in multi_ref_properties
-                    or not is_exportable(property, property_value_map)
+                    not property["relation"]
+                    or property["name"] in multi_ref_properties
+                    or not property["exportable"]
                 ):
                     continue
-                parse = get_parser_reverse(property, property_value_map)
-                for alias in get_aliases(property, property_value_map):
-                    values = [
-                        relation["key"]
-                        for relation in document["relations"]
-                        if relation["type"] == property
-                    ]
+                values = relation_keys.get(property["name"], [])
+                for alias in property["aliases"]:
                     if len(values) > 1:
-                        multi_ref_properties.append(property)
-                        values = [values[0]]
+                        multi_ref_properties.append(property["name"])
                     if not base_frame_data.get(alias) and not frame_data.get(alias):
-                        frame_data.update({alias: parse(values[0]) if values else ""})
+                        frame_data.update(
+                            {alias: property["parse"](values[0]) if values else ""}
+                        )
             data.append({**base_frame_data, **dict(sorted(frame_data.items()))})
 
             base_frame_data = {
@@ -176,22 +156,17 @@ class DamsSerializer:
                     if key not in base_frame_data.keys()
                 },
             }
-            for property in multi_ref_properties:
+            for property_name in multi_ref_properties:
+                property = properties[property_name]
                 frame_data = {}
-                parse = get_parser_reverse(property, property_value_map)
-                for alias in get_aliases(property, property_value_map):
-                    values = [
-                        relation["key"]
-                        for relation in document["relations"]
-                        if relation["type"] == property
-                    ]
-                    values.pop(0)
+                for alias in property["aliases"]:
+                    values = relation_keys[property_name][1:]
                     if not base_frame_data.get(alias) and not frame_data.get(alias):
                         for value in values:
-                            frame_data.update({alias: parse(value)})
+                            frame_data.update({alias: property["parse"](value)})
                             data.append({**base_frame_data, **frame_data})
 
-        return DataFrame(data)
+        return DataFrame(data, dtype=dtype)
 
     def _parse_dataframe_to_dams(
         self, columns, row, document_type="", property_value_map={}
@@ -226,7 +201,9 @@ class DamsSerializer:
                 if isinstance(value, str):
                     value = value.strip()
                 if value:
-                    properties = get_properties(column_name, property_value_map)
+                    properties = get_properties(
+                        column_name, property_value_map, document_type
+                    )
                 else:
                     continue
 
@@ -259,3 +236,52 @@ class DamsSerializer:
                 exceptions.append(str(exception))
 
         return document if not exceptions else {**document, "exceptions": exceptions}
+
+    def __sniff_delimiter(self, data):
+        # sniff on the header line only, like read_csv does for sep=None
+        line = TextIOWrapper(BytesIO(data), encoding="utf-8", newline="").readline()
+        if not line.strip():
+            return None
+        return Sniffer().sniff(line).delimiter
+
+    def __get_export_columns(self, document_type):
+        base_columns, columns = ["type"], set()
+        for property in self.__get_export_properties(document_type).values():
+            if property["required"]:
+                base_columns.extend(property["aliases"])
+            if property["exportable"]:
+                columns.update(property["aliases"])
+        base_columns = list(dict.fromkeys(base_columns))
+        return base_columns + sorted(columns.difference(base_columns))
+
+    def __get_export_properties(self, document_type):
+        property_value_map = get_property_value_map(document_type)
+        properties = {}
+        for property in get_user_requested_properties(property_value_map):
+            snake_property = camel_to_snake(property)
+            properties[property] = {
+                "name": property,
+                "aliases": get_aliases(property, property_value_map),
+                "exportable": is_exportable(property, property_value_map),
+                "parse": get_parser_reverse(property, property_value_map),
+                "relation": snake_property.startswith("has_")
+                or (
+                    snake_property.startswith("is_") and snake_property.endswith("_for")
+                ),
+                # this ugly hardcoded condition is temporary until data format change
+                "required": is_required_property(property, document_type)
+                or (document_type == "mediafile" and property == "file_identifier"),
+            }
+        return properties
+
+    def __index_document(self, document):
+        metadata_values, relation_keys = {}, {}
+        for metadata in document["metadata"]:
+            metadata_values.setdefault(metadata["key"], []).append(metadata["value"])
+        for relation in document["relations"]:
+            relation_keys.setdefault(relation["type"], []).append(relation["key"])
+        return metadata_values, relation_keys
+
+    def __to_csv_rows(self, documents, document_type, columns):
+        data_frame = self._parse_dams_to_dataframe(documents, document_type, object)
+        return data_frame.reindex(columns=columns).to_csv(index=False, header=False)
@@ -1,10 +1,27 @@
 from app_context import g, request  # pyright: ignore
 from apps.podiumnet.validation.util import (
+    get_document_types,
+    get_property_index,
     get_required_properties,
     get_schema_properties,
 )
 from datetime import datetime
+from functools import cache
 from importlib import import_module
+from importlib.util import find_spec
+
+
+def check_parsers():
+    missing_parsers = []
+    for document_type in get_document_types():
+        for property, value in get_schema_properties(document_type).items():
+            parser = value.get("_customAttributes", {}).get("parser")
+            if parser and not __parser_exists(parser):
+                missing_parsers.append(f"{document_type}.{property}: {parser}")
+    if missing_parsers:
+        raise ModuleNotFoundError(
+            f"Parser modules configured in validators do not exist in apps.podiumnet.parsers: {', '.join(missing_parsers)}"
+        )
 
 
 def get_aliases(property: str, property_value_map: dict):
@@ -24,36 +41,28 @@ def get_parser(property: str, property_value_map: dict, property_type: str):
     parser = (
         property_value_map.get(property, {}).get("_customAttributes", {}).get("parser")
     )
-    try:
-        if not g.get("enable_parsers"):
-            raise Exception("Parsers not enabled")
-        return import_module(f"apps.podiumnet.parsers.{parser}").parse
-    except Exception:
-        if property == "_id":
-            return lambda value, **_: value
-        elif property_type == "metadata":
-            return lambda value, **_: [{"key": property, "value": value}]
-        elif property_type == "relations":
-            return lambda value, **_: [{"key": value, "type": property}]
-        else:
-            raise Exception(f"Property type '{property_type}' not supported.")
+    if g.get("enable_parsers") and (parse := __get_parser(parser, "parse")):
+        return parse
+    return __get_default_parser(property, property_type)
 
 
 def get_parser_reverse(property: str, property_value_map: dict):
     parser = (
         property_value_map.get(property, {}).get("_customAttributes", {}).get("parser")
     )
-    try:
-        if not g.get("enable_parsers"):
-            raise Exception("Parsers not enabled")
-        return import_module(f"apps.podiumnet.parsers.{parser}").parse_reverse
-    except Exception:
-        return lambda value, **_: value
+    if g.get("enable_parsers") and (
+        parse_reverse := __get_parser(parser, "parse_reverse")
+    ):
+        return parse_reverse
+    return __identity_parser
 
 
-def get_properties(key: str, property_value_map: dict):
-    properties = []
+def get_properties(key: str, property_value_map: dict, document_type: str = ""):
     key = key.lower().strip().replace(" ", "_")
+    if document_type:
+        return list(get_property_index(document_type).get(key, []))
+
+    properties = []
     for property, value in property_value_map.items():
         aliases = value.get("_customAttributes", {}).get("aliases", [])
         if property == key or key in aliases:
@@ -66,7 +75,7 @@ def get_property_value_map(document_type: str):
 
 
 def get_user_requested_properties(property_value_map):
-    fields = request.args.getlist("field") or property_value_map.keys()
+    fields = set(request.args.getlist("field") or property_value_map.keys())
     return [
         property
         for property in property_value_map.keys()
@@ -109,3 +118,34 @@ def is_readonly(property: str, property_value_map: dict):
 
 def is_required_property(property: str, document_type: str):
     return property in get_required_properties(document_type)
+
+
+@cache
+def __get_default_parser(property: str, property_type: str):
+    if property == "_id":
+        return __identity_parser
+    elif property_type == "metadata":
+        return lambda value, **_: [{"key": property, "value": value}]
+    elif property_type == "relations":
+        return lambda value, **_: [{"key": value, "type": property}]
+    else:
+        raise Exception(f"Property type '{property_type}' not supported.")
+
+
+@cache
+def __get_parser(parser, function_name):
+    try:
+        return getattr(import_module(f"apps.podiumnet.parsers.{parser}"), function_name)
+    except Exception:
+        return None
+
+
+def __identity_parser(value, **_):
+    return value
+
+
+def __parser_exists(parser):
+    try:
+        return find_spec(f"apps.podiumnet.parsers.{parser}") is not None
+    except ModuleNotFoundError:
+        return False
@@ -1,125 +1,155 @@
 from app_context import request  # pyright: ignore
 from apps.podiumnet.validation.dams_validator import (SCHEMA_TEMPLATE)
+from copy import deepcopy
+from functools import lru_cache
 from importlib import import_module
-from json import loads
+from pkgutil import iter_modules
+from types import MappingProxyType
+
+
+__VALIDATOR_CACHE_SIZE = 256
+__VALIDATOR_PACKAGES = [
+    "apps.podiumnet.validation",
+    "apps.podiumnet.validation.wrapper_object_validators",
+]
 
 
 def get_schema(document_type):
     if not document_type:
         return {}
-    elif document_type == "elody":
-        return __construct_schema()
 
-    validator = __import_module(document_type)
+    return __get_schema(document_type, __are_required_properties_applicable())
+
+
+@lru_cache(maxsize=__VALIDATOR_CACHE_SIZE)
+def __get_schema(document_type, required_properties_applicable):
+    if document_type == "elody":
+        return __construct_schema(
+            required_properties_applicable=required_properties_applicable
+        )
+
+    if not (validator := __load_validator(document_type)):
+        raise ModuleNotFoundError(__get_validator_paths(document_type))
     metadata_map = validator.METADATA_MAP
     required_metadata = validator.REQUIRED_METADATA
     relations_map = validator.RELATIONS_MAP
     required_relations = validator.REQUIRED_RELATIONS
 
     return __construct_schema(
-        metadata_map, required_metadata, relations_map, required_relations
+        metadata_map,
+        required_metadata,
+        relations_map,
+        required_relations,
+        required_properties_applicable=required_properties_applicable,
     )
 
 
-def get_schema_properties(document_type):
+def get_document_types():
+    document_types = []
+    for package in __VALIDATOR_PACKAGES:
+        try:
+            paths = import_module(package).__path__
+        except ModuleNotFoundError:
+            continue
+        for _, name, _ in iter_modules(paths):
+            document_type = name.removesuffix("_validator")
+            if name != document_type and hasattr(
+                __load_validator(document_type), "METADATA_MAP"
+            ):
+                document_types.append(document_type)
+    return list(dict.fromkeys(document_types))
+
+
+def get_property_index(document_type):
     if not document_type or document_type == "elody":
         return {}
 
-    try:
-        validator = __import_module(document_type)
-    except ModuleNotFoundError:
+    if __load_validator(document_type):
+        return __get_property_index(document_type)
+    return {}
+
+
+def get_schema_properties(document_type):
+    if not document_type or document_type == "elody":
         return {}
-    return {**validator.METADATA_MAP, **validator.RELATIONS_MAP}
+
+    if validator_properties := __get_validator_properties(document_type):
+        return MappingProxyType(validator_properties["properties"])
+    return {}
 
 
 def get_required_properties(document_type):
     if not document_type or document_type == "elody":
         return []
 
-    try:
-        validator = __import_module(document_type)
-    except ModuleNotFoundError:
-        return []
-    return [*validator.REQUIRED_METADATA, *validator.REQUIRED_RELATIONS]
+    if validator_properties := __get_validator_properties(document_type):
+        return list(validator_properties["required"])
+    return []
 
 
 def get_virtual_properties(document_type):
     if not document_type or document_type == "elody":
         return []
 
-    try:
-        validator = __import_module(document_type)
-        properties = {**validator.METADATA_MAP, **validator.RELATIONS_MAP}
-        return [
-            key
-            for key, property in properties.items()
-            if property.get("_customAttributes", {}).get("virtual")
-        ]
-    except ModuleNotFoundError:
-        return []
+    if validator_properties := __get_validator_properties(document_type):
+        return list(validator_properties["virtual"])
+    return []
 
 
 def get_hierarchy_properties_in_order(document_type, reverse=False):
     if not document_type or document_type == "elody":
         return []
 
-    try:
-        validator = __import_module(document_type)
-        properties = {**validator.METADATA_MAP, **validator.RELATIONS_MAP}
-        properties = dict(
-            sorted(
-                properties.items(),
-                key=lambda property: property[1]
-                .get("_customAttributes", {})
-                .get("hierarchy_level", float("inf")),
-                reverse=reverse,
-            )
+    if validator_properties := __get_validator_properties(document_type):
+        return list(
+            validator_properties["hierarchy_reversed" if reverse else "hierarchy"]
         )
-        return [
-            key
-            for key, property in properties.items()
-            if property.get("_customAttributes", {}).get("hierarchy_level")
-        ]
-    except ModuleNotFoundError:
-        return []
+    return []
 
 
 def __construct_schema(
-    metadata_map={}, required_metadata=[], relations_map={}, required_relations=[]
+    metadata_map={},
+    required_metadata=[],
+    relations_map={},
+    required_relations=[],
+    *,
+    required_properties_applicable=True,
 ) -> dict:
-    metadata, required_metadata = __construct_metadata(metadata_map, required_metadata)
+    metadata, required_metadata = __construct_metadata(
+        deepcopy(metadata_map), required_metadata
+    )
     relations, required_relations = __construct_relations(
-        relations_map, required_relations
+        deepcopy(relations_map), required_relations
     )
 
-    return loads(
-        str(SCHEMA_TEMPLATE)
-        .replace(", 'METADATA': []", f", 'oneOf': {metadata}" if metadata else "")
-        .replace(
-            "'REQUIRED_METADATA': [],",
-            (
-                f"'allOf': {required_metadata},"
-                if required_metadata
-                and request.method != "PATCH"
-                and request.endpoint != "elody.elodydocumentrelations"
-                else ""
-            ),
-        )
-        .replace(", 'RELATIONS': []", f", 'oneOf': {relations}" if relations else "")
-        .replace(
-            "'REQUIRED_RELATIONS': [],",
-            (
-                f"'allOf': {required_relations},"
-                if required_relations
-                and request.method != "PATCH"
-                and request.endpoint != "elody.elodydocumentrelations"
-                else ""
-            ),
-        )
-        .replace("'", '"')
-        .replace("False", "false")
-        .replace("True", "true")
+    schema = deepcopy(SCHEMA_TEMPLATE)
+    schema["properties"]["metadata"] = __replace_placeholder(
+        schema["properties"]["metadata"],
+        "REQUIRED_METADATA",
+        {"allOf": required_metadata} if required_properties_applicable else {},
+    )
+    schema["properties"]["metadata"]["items"] = __replace_placeholder(
+        schema["properties"]["metadata"]["items"], "METADATA", {"oneOf": metadata}
+    )
+    schema["properties"]["relations"] = __replace_placeholder(
+        schema["properties"]["relations"],
+        "REQUIRED_RELATIONS",
+        {"allOf": required_relations} if required_properties_applicable else {},
+    )
+    schema["properties"]["relations"]["items"] = __replace_placeholder(
+        schema["properties"]["relations"]["items"], "RELATIONS", {"oneOf": relations}
     )
+    return schema
+
+
+@lru_cache(maxsize=__VALIDATOR_CACHE_SIZE)
+def __get_property_index(document_type):
+    property_index = {}
+    for property, value in get_schema_properties(document_type).items():
+        aliases = value.get("_customAttributes", {}).get("aliases", [])
+        for name in dict.fromkeys([property, *aliases]):
+            property_index[name] = (*property_index.get(name, ()), property)
+    return MappingProxyType(property_index)
 
 
 def __construct_metadata(metadata_map={}, required_metadata=[]):
@@ -199,14 +229,78 @@ def __construct_relations(relations_map={}, required_relations=[]):
     return relations, required_relations
 
 
-def __import_module(document_type):
-    paths = [
-        f"apps.podiumnet.validation.{document_type}_validator",
-        f"apps.podiumnet.validation.wrapper_object_validators.{document_type}_validator",
-    ]
-    for path in paths:
+def __replace_placeholder(schema, placeholder, replacement):
+    replaced_schema = {}
+    for key, value in schema.items():
+        if key != placeholder:
+            replaced_schema[key] = value
+        else:
+            replaced_schema.update(
+                {
+                    replacement_key: replacement_value
+                    for replacement_key, replacement_value in replacement.items()
+                    if replacement_value
+                }
+            )
+    return replaced_schema
+
+
+def __get_validator_properties(document_type):
+    if __load_validator(document_type):
+        return __load_validator_properties(document_type)
+    return None
+
+
+@lru_cache(maxsize=__VALIDATOR_CACHE_SIZE)
+def __load_validator(document_type):
+    for path in __get_validator_paths(document_type):
         try:
             return import_module(path)
         except ModuleNotFoundError:
             pass
-    raise ModuleNotFoundError(paths)
+    return None
+
+
+@lru_cache(maxsize=__VALIDATOR_CACHE_SIZE)
+def __load_validator_properties(document_type):
+    validator = __load_validator(document_type)
+    properties = {**validator.METADATA_MAP, **validator.RELATIONS_MAP}
+    return {
+        "properties": properties,
+        "required": [*validator.REQUIRED_METADATA, *validator.REQUIRED_RELATIONS],
+        "virtual": [
+            key
+            for key, property in properties.items()
+            if property.get("_customAttributes", {}).get("virtual")
+        ],
+        "hierarchy": __sort_hierarchy_properties(properties),
+        "hierarchy_reversed": __sort_hierarchy_properties(properties, reverse=True),
+    }
+
+
+def __get_validator_paths(document_type):
+    return [f"{package}.{document_type}_validator" for package in __VALIDATOR_PACKAGES]
+
+
+def __sort_hierarchy_properties(properties, reverse=False):
+    properties = dict(
+        sorted(
+            properties.items(),
+            key=lambda property: property[1]
+            .get("_customAttributes", {})
+            .get("hierarchy_level", float("inf")),
+            reverse=reverse,
+        )
+    )
+    return [
+        key
+        for key, property in properties.items()
+        if property.get("_customAttributes", {}).get("hierarchy_level")
+    ]
+
+
+def __are_required_properties_applicable():
+    return (
+        request.method != "PATCH"
+        and request.endpoint != "elody.elodydocumentrelations"
+    )
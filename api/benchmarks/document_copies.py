@@ -0,0 +1,65 @@
+from apps.podiumnet.serializers.dams_serializer import DamsSerializer
+from copy import deepcopy
+from flask import Flask
+from tracemalloc import get_traced_memory, reset_peak, start, stop
+
+METADATA_ITEMS = 500
+RELATIONS = 2000
+TECHNICAL_METADATA_ENTRIES = 5000
+
+
+def get_document():
+    return {
+        "_id": "asset",
+        "identifiers": ["asset"],
+        "metadata": [
+            {"key": f"property_{index}", "value": f"value {index}", "lang": "nl"}
+            for index in range(METADATA_ITEMS)
+        ],
+        "relations": [
+            {
+                "key": f"mediafile-{index}",
+                "metadata": [{"key": "order", "value": index}],
+                "sort": {"order": [{"value": index}]},
+                "type": "hasMediafile",
+            }
+            for index in range(RELATIONS)
+        ],
+        "schema": {"type": "dams", "version": 1},
+        "technical_metadata": {
+            f"entry_{index}": {"values": [index, str(index), {"index": index}]}
+            for index in range(TECHNICAL_METADATA_ENTRIES)
+        },
+        "type": "asset",
+    }
+
+
+def measure(serialize):
+    document = get_document()
+    start()
+    reset_peak()
+    serialize(document)
+    _, peak = get_traced_memory()
+    stop()
+    return peak
+
+
+def main():
+    app = Flask(__name__)
+    serializer = DamsSerializer()
+    for operation, method, serialize in [
+        ("create", "POST", serializer.from_elody_to_dams),
+        ("update", "PATCH", serializer.from_elody_to_dams),
+        ("read", "GET", serializer.from_dams_to_elody),
+    ]:
+        with app.test_request_context("/entities", method=method):
+            old_peak = measure(lambda document: serialize(deepcopy(document)))
+            new_peak = measure(serialize)
+        print(
+            f"{operation:<6} deepcopy {old_peak / 1e6:6.2f} MB"
+            f"   shallow copy {new_peak / 1e6:6.2f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
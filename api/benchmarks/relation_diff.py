@@ -0,0 +1,76 @@
+from apps.podiumnet.object_configurations.util import diff_relations
+from random import Random
+from time import perf_counter
+
+RELATION_COUNTS = [10, 1000, 10000]
+RELATION_TYPES = ["hasAssetPart", "hasMediafile", "hasTag"]
+
+
+def diff_relations_with_any(old_relations, new_relations):
+    created = [
+        new_relation
+        for new_relation in new_relations
+        if not any(
+            [
+                old_relation
+                for old_relation in old_relations
+                if new_relation["key"] == old_relation["key"]
+                and new_relation["type"] == old_relation["type"]
+            ]
+        )
+    ]
+    deleted = [
+        old_relation
+        for old_relation in old_relations
+        if not any(
+            [
+                new_relation
+                for new_relation in new_relations
+                if old_relation["key"] == new_relation["key"]
+                and old_relation["type"] == new_relation["type"]
+            ]
+        )
+    ]
+    return created, deleted
+
+
+def get_relations(count, random):
+    old_relations = [
+        {"key": f"relation-{index}", "type": random.choice(RELATION_TYPES)}
+        for index in range(count)
+    ]
+    new_relations = old_relations[count // 10 :] + [
+        {"key": f"new-relation-{index}", "type": "hasMediafile"}
+        for index in range(count // 10)
+    ]
+    return old_relations, new_relations
+
+
+def measure(diff, repetitions):
+    started_at = perf_counter()
+    for _ in range(repetitions):
+        result = diff()
+    return result, (perf_counter() - started_at) / repetitions
+
+
+def main():
+    random = Random(0)
+    for count in RELATION_COUNTS:
+        old_relations, new_relations = get_relations(count, random)
+        repetitions = 1 if count >= 10000 else 5
+        (created, deleted), old_duration = measure(
+            lambda: diff_relations_with_any(old_relations, new_relations),
+            repetitions,
+        )
+        (added, removed, _), new_duration = measure(
+            lambda: diff_relations(old_relations, new_relations), repetitions * 20
+        )
+        assert (created, deleted) == (added, removed), f"{count} diffs differ"
+        print(
+            f"{count:>6} relations   nested any {old_duration * 1000:10.2f} ms"
+            f"   diff_relations {new_duration * 1000:7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
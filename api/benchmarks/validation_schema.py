@@ -0,0 +1,109 @@
+from apps.podiumnet.validation import util
+from apps.podiumnet.validation.dams_validator import SCHEMA_TEMPLATE
+from json import dumps, loads
+from time import perf_counter
+
+BUILDS = 50
+METADATA_PROPERTIES = 400
+RELATION_PROPERTIES = 120
+
+construct_metadata = vars(util)["__construct_metadata"]
+construct_relations = vars(util)["__construct_relations"]
+construct_schema = vars(util)["__construct_schema"]
+
+
+def construct_schema_from_repr(
+    metadata_map, required_metadata, relations_map, required_relations, applicable
+):
+    metadata, required_metadata = construct_metadata(metadata_map, required_metadata)
+    relations, required_relations = construct_relations(
+        relations_map, required_relations
+    )
+    return loads(
+        str(SCHEMA_TEMPLATE)
+        .replace(", 'METADATA': []", f", 'oneOf': {metadata}" if metadata else "")
+        .replace(
+            "'REQUIRED_METADATA': [],",
+            (
+                f"'allOf': {required_metadata},"
+                if required_metadata and applicable
+                else ""
+            ),
+        )
+        .replace(", 'RELATIONS': []", f", 'oneOf': {relations}" if relations else "")
+        .replace(
+            "'REQUIRED_RELATIONS': [],",
+            (
+                f"'allOf': {required_relations},"
+                if required_relations and applicable
+                else ""
+            ),
+        )
+        .replace("'", '"')
+        .replace("False", "false")
+        .replace("True", "true")
+    )
+
+
+def get_validator_maps():
+    metadata_map = {
+        f"property_{index}": {
+            "type": "string",
+            "_customAttributes": {
+                "aliases": [f"property {index}"],
+                "exportable": index % 3 != 0,
+            },
+        }
+        for index in range(METADATA_PROPERTIES)
+    }
+    relations_map = {
+        f"hasRelation{index}": {"type": "string", "minLength": 1}
+        for index in range(RELATION_PROPERTIES)
+    }
+    return (
+        metadata_map,
+        list(metadata_map)[::10],
+        relations_map,
+        list(relations_map)[::10],
+    )
+
+
+def measure(build):
+    started_at = perf_counter()
+    for _ in range(BUILDS):
+        schema = build()
+    return schema, (perf_counter() - started_at) / BUILDS
+
+
+def main():
+    metadata_map, required_metadata, relations_map, required_relations = (
+        get_validator_maps()
+    )
+    for method, applicable in [("POST", True), ("PATCH", False)]:
+        old_schema, old_duration = measure(
+            lambda: construct_schema_from_repr(
+                metadata_map,
+                required_metadata,
+                relations_map,
+                required_relations,
+                applicable,
+            )
+        )
+        new_schema, new_duration = measure(
+            lambda: construct_schema(
+                metadata_map,
+                required_metadata,
+                relations_map,
+                required_relations,
+                required_properties_applicable=applicable,
+            )
+        )
+        assert dumps(old_schema) == dumps(new_schema), f"{method} schemas differ"
+        print(
+            f"{method:<5} repr/replace {old_duration * 1000:7.2f} ms"
+            f"   structured {new_duration * 1000:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import pytest
+
+from apps.podiumnet.resources import base_resource
+from apps.podiumnet.resources.base_resource import PodiumnetBaseResource
+from storage.memorystore import MemoryStorageManager
+from storage.mongostore import MongoStorageManager
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture(autouse=True)
+def object_configuration_mapper(monkeypatch):
+    mapper = {}
+    monkeypatch.setattr(
+        base_resource, "get_object_configuration_mapper", lambda: mapper
+    )
+    return mapper
+
+
+@pytest.fixture(params=["mongo", "memory"])
+def storage(request):
+    if request.param == "mongo":
+        storage = MongoStorageManager.__new__(MongoStorageManager)
+        storage.db = mongomock.MongoClient().db
+        return storage
+    return MemoryStorageManager()
+
+
+@pytest.fixture
+def resource(storage):
+    resource = PodiumnetBaseResource.__new__(PodiumnetBaseResource)
+    resource.storage = storage
+    return resource
@@ -0,0 +1,170 @@
+import pytest
+
+from app_context import g  # pyright: ignore
+from apps.podiumnet.resources import entity
+from apps.podiumnet.serializers import attribution
+from flask import Flask, Response
+from storage.mongostore import MongoStorageManager
+
+
+class _Configuration:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def crud(self):
+        return {
+            "collection": self.collection,
+            "post_crud_hook": lambda **_: None,
+            "pre_crud_hook": lambda *, document, **_: document,
+        }
+
+    def document_info(self):
+        return {"object_lists": {"metadata": "key", "relations": "type"}}
+
+
+@pytest.fixture
+def mongo_resource(resource, object_configuration_mapper, monkeypatch):
+    if not isinstance(resource.storage, MongoStorageManager):
+        pytest.skip("attributions are materialized with mongo bulk writes")
+    object_configuration_mapper.update(
+        {
+            "asset": _Configuration("entities"),
+            "institution": _Configuration("entities"),
+            "mediafile": _Configuration("mediafiles"),
+            "photographer": _Configuration("entities"),
+        }
+    )
+    monkeypatch.setattr(
+        attribution,
+        "get_object_configuration_mapper",
+        lambda: object_configuration_mapper,
+    )
+    monkeypatch.setattr(attribution, "PodiumnetBaseResource", lambda: resource)
+    db = resource.storage.db
+    db.entities.insert_many(
+        [
+            _document("asset", "a1", {"title": "Vase"}, {"hasInstitution": "i1"}),
+            _document("institution", "i1", {"name": "Museum"}),
+            _document("photographer", "p1", {"name": "Jan"}),
+        ]
+    )
+    db.mediafiles.insert_many(
+        [
+            _document("mediafile", "m1", {}, {"isMediafileFor": "a1"}),
+            _document("mediafile", "m2", {}, {"hasPhotographer": "p1"}),
+        ]
+    )
+    return resource
+
+
+def _attributions(resource, id):
+    return {
+        metadata["key"]: metadata["value"]
+        for metadata in resource.storage.db.mediafiles.find_one({"_id": id})[
+            "metadata"
+        ]
+        if metadata["key"] in ["attribution", "minimal_attribution"]
+    }
+
+
+def _document(type, id, metadata={}, relations={}):
+    return {
+        "_id": id,
+        "identifiers": [id],
+        "metadata": [{"key": key, "value": value} for key, value in metadata.items()],
+        "relations": [{"key": key, "type": type} for type, key in relations.items()],
+        "type": type,
+    }
+
+
+def test_backfill_attributions_command(mongo_resource):
+    app = Flask(__name__)
+    app.cli.add_command(entity.backfill_attributions_command)
+
+    result = app.test_cli_runner().invoke(args=["backfill-attributions"])
+    assert result.output == "Updated attributions of 2 mediafiles\n"
+    assert _attributions(mongo_resource, "m1") == {
+        "attribution": "Vase, Museum",
+        "minimal_attribution": "Museum",
+    }
+    assert _attributions(mongo_resource, "m2") == {
+        "attribution": "foto: Jan",
+        "minimal_attribution": "foto: Jan",
+    }
+
+    result = app.test_cli_runner().invoke(args=["backfill-attributions"])
+    assert result.output == "Updated attributions of 0 mediafiles\n"
+
+
+def test_refresh_attributions_is_deferred_until_after_request(mongo_resource):
+    attribution.backfill_attributions()
+    db = mongo_resource.storage.db
+    app = Flask(__name__)
+
+    with app.test_request_context():
+        g.attribution_documents = {("asset", "a1"): ({}, {})}
+        for institution in ["i1", "i1"]:
+            document = db.entities.find_one({"_id": institution})
+            unpatched_document = {**document, "metadata": []}
+            db.entities.update_one(
+                {"_id": institution},
+                {"$set": {"metadata": [{"key": "name", "value": "Archive"}]}},
+            )
+            attribution.refresh_attributions(
+                "update", db.entities.find_one({"_id": institution}), unpatched_document
+            )
+        assert _attributions(mongo_resource, "m1")["minimal_attribution"] == "Museum"
+
+        app.process_response(Response())
+
+        assert _attributions(mongo_resource, "m1") == {
+            "attribution": "Vase, Archive",
+            "minimal_attribution": "Archive",
+        }
+        assert g.attribution_documents == {("asset", "a1"): ({}, {})}
+
+
+def test_refresh_attributions_ignores_unrelated_changes(mongo_resource):
+    attribution.backfill_attributions()
+    db = mongo_resource.storage.db
+    document = db.entities.find_one({"_id": "a1"})
+    mediafile = db.mediafiles.find_one({"_id": "m1"})
+
+    attribution.refresh_attributions(
+        "update",
+        {**document, "metadata": [*document["metadata"], {"key": "x", "value": 1}]},
+        document,
+    )
+
+    assert db.mediafiles.find_one({"_id": "m1"}) == mediafile
+
+
+def test_backfill_attributions_counts_failures(mongo_resource, monkeypatch, caplog):
+    get_attribution_metadata = attribution.get_attribution_metadata
+
+    def fail_for_m2(document, *args):
+        if document["_id"] == "m2":
+            raise KeyError("name")
+        return get_attribution_metadata(document, *args)
+
+    monkeypatch.setattr(attribution, "get_attribution_metadata", fail_for_m2)
+
+    assert attribution.backfill_attributions() == (1, 1)
+    assert "mediafile m2" in caplog.text
+    assert _attributions(mongo_resource, "m2") == {}
+
+
+def test_refresh_attributions_failure_keeps_response(mongo_resource, monkeypatch):
+    def fail(_):
+        raise RuntimeError("storage unavailable")
+
+    monkeypatch.setattr(attribution, "__refresh", fail)
+    app = Flask(__name__)
+    response = Response()
+
+    with app.test_request_context():
+        attribution.refresh_attributions(
+            "update", mongo_resource.storage.db.mediafiles.find_one({"_id": "m1"})
+        )
+
+        assert app.process_response(response) is response
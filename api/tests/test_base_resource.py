@@ -0,0 +1,253 @@
+import pytest
+
+from apps.podiumnet.resources import base_resource
+from storage.mongostore import MongoStorageManager
+from werkzeug.exceptions import HTTPException
+
+
+def _get(storage, collection, id):
+    if isinstance(storage, MongoStorageManager):
+        return storage.db[collection].find_one({"_id": id})
+    return storage.get_item_from_collection_by_id(collection, id)
+
+
+def _save(storage, collection, item):
+    if isinstance(storage, MongoStorageManager):
+        storage.db[collection].insert_one(item)
+    else:
+        storage.save_item_to_collection(collection, item)
+    return _get(storage, collection, item["_id"])
+
+
+def _entity(id, metadata=[], relations=[]):
+    return {
+        "_id": id,
+        "identifiers": [id],
+        "metadata": list(metadata),
+        "relations": list(relations),
+        "schema": {"type": "dams", "version": 1},
+        "type": "entity",
+    }
+
+
+def test_bulk_patch_relations(resource):
+    item = _save(
+        resource.storage,
+        "entities",
+        _entity(
+            "a",
+            relations=[
+                {"key": "m1", "type": "hasMediafile", "sort": {"order": [1]}},
+                {"key": "m2", "type": "hasMediafile"},
+                {"key": "p1", "type": "isAssetPartFor"},
+            ],
+        ),
+    )
+
+    resource._bulk_patch_relations(
+        "entities",
+        [
+            (
+                item,
+                [
+                    {"key": "m1", "type": "hasMediafile", "sort": {"order": [2]}},
+                    {"key": "m3", "type": "hasMediafile"},
+                ],
+                [{"key": "m2", "type": "hasMediafile"}],
+            )
+        ],
+        run_post_crud_hook=False,
+    )
+
+    relations = _get(resource.storage, "entities", "a")["relations"]
+    assert sorted(relations, key=lambda relation: relation["key"]) == [
+        {"key": "m1", "type": "hasMediafile", "sort": {"order": [2]}},
+        {"key": "m3", "type": "hasMediafile"},
+        {"key": "p1", "type": "isAssetPartFor"},
+    ]
+
+
+def test_bulk_patch_relations_skips_empty_patches(resource):
+    item = _save(
+        resource.storage,
+        "entities",
+        _entity("a", relations=[{"key": "m1", "type": "hasMediafile"}]),
+    )
+
+    resource._bulk_patch_relations("entities", [(item, [], [])])
+
+    assert _get(resource.storage, "entities", "a")["relations"] == [
+        {"key": "m1", "type": "hasMediafile"}
+    ]
+
+
+def test_bulk_patch_metadata(resource):
+    item = _save(
+        resource.storage,
+        "entities",
+        _entity(
+            "a",
+            metadata=[
+                {"key": "copyright", "value": "old"},
+                {"key": "title", "value": "Title"},
+            ],
+        ),
+    )
+
+    resource._bulk_patch_metadata(
+        "entities",
+        [
+            (
+                item,
+                [
+                    {"key": "copyright", "value": "new"},
+                    {"key": "photographer", "value": "Photographer"},
+                ],
+            )
+        ],
+    )
+
+    metadata = _get(resource.storage, "entities", "a")["metadata"]
+    assert sorted(metadata, key=lambda value: value["key"]) == [
+        {"key": "copyright", "value": "new"},
+        {"key": "photographer", "value": "Photographer"},
+        {"key": "title", "value": "Title"},
+    ]
+
+
+@pytest.mark.parametrize("storage", ["mongo"], indirect=True)
+def test_bulk_writes_set_audit_fields(resource):
+    item = _save(resource.storage, "entities", _entity("a"))
+
+    resource._bulk_update(
+        {
+            "entities": [
+                (
+                    item,
+                    {**item, "relations": [{"key": "m1", "type": "hasMediafile"}]},
+                )
+            ]
+        }
+    )
+
+    document = _get(resource.storage, "entities", "a")
+    assert document["date_updated"]
+    assert document["last_editor"] == "default_uploader"
+
+
+@pytest.mark.parametrize("storage", ["mongo"], indirect=True)
+def test_bulk_writes_run_pre_crud_hook(resource, object_configuration_mapper):
+
+    class Configuration:
+        def crud(self):
+            return {"pre_crud_hook": self.pre_crud_hook}
+
+        def pre_crud_hook(self, *, crud, document, unpatched_document):
+            document["ref_assets"] = [
+                relation["key"]
+                for relation in document["relations"]
+                if relation["type"] == "isMediafileFor"
+            ]
+            return document
+
+    object_configuration_mapper["entity"] = Configuration()
+    item = _save(resource.storage, "entities", _entity("a"))
+
+    resource._bulk_patch_relations(
+        "entities",
+        [(item, [{"key": "asset", "type": "isMediafileFor"}], [])],
+        run_post_crud_hook=False,
+    )
+
+    document = _get(resource.storage, "entities", "a")
+    assert document["ref_assets"] == ["asset"]
+    assert item.get("ref_assets") is None
+
+
+def test_bulk_update(resource):
+    entity = _save(resource.storage, "entities", _entity("a"))
+    mediafile = _save(resource.storage, "mediafiles", _entity("m1"))
+    unchanged_mediafile = _save(resource.storage, "mediafiles", _entity("m2"))
+
+    resource._bulk_update(
+        {
+            "entities": [
+                (
+                    entity,
+                    {**entity, "relations": [{"key": "m1", "type": "hasMediafile"}]},
+                )
+            ],
+            "mediafiles": [
+                (
+                    mediafile,
+                    {**mediafile, "metadata": [{"key": "order", "value": 1}]},
+                )
+            ],
+        }
+    )
+
+    assert _get(resource.storage, "entities", "a")["relations"] == [
+        {"key": "m1", "type": "hasMediafile"}
+    ]
+    assert _get(resource.storage, "mediafiles", "m1")["metadata"] == [
+        {"key": "order", "value": 1}
+    ]
+    assert _get(resource.storage, "mediafiles", "m2") == unchanged_mediafile
+
+
+def test_bulk_update_validates_every_document_before_writing(
+    resource, object_configuration_mapper, monkeypatch
+):
+
+    class Configuration:
+        def validation(self):
+            return "schema", {}
+
+    object_configuration_mapper["entity"] = Configuration()
+    monkeypatch.setattr(
+        base_resource,
+        "validate_json",
+        lambda document, _: document["metadata"] and "invalid metadata",
+    )
+    valid_item = _save(resource.storage, "entities", _entity("a"))
+    invalid_item = _save(resource.storage, "entities", _entity("b"))
+
+    with pytest.raises(HTTPException) as exception:
+        resource._bulk_update(
+            {
+                "entities": [
+                    (valid_item, {**valid_item, "relations": []}),
+                    (
+                        invalid_item,
+                        {**invalid_item, "metadata": [{"key": "x", "value": 1}]},
+                    ),
+                ]
+            }
+        )
+
+    assert exception.value.code == 400
+    assert _get(resource.storage, "entities", "a") == valid_item
+    assert _get(resource.storage, "entities", "b") == invalid_item
+
+
+def test_cascade_delete_yields_deleted_batches(resource):
+    if not isinstance(resource.storage, MongoStorageManager):
+        pytest.skip("other storages delete through the filter resource")
+    for id in ["a", "b", "c", "d", "e"]:
+        _save(resource.storage, "entities", _entity(id))
+
+    batches = resource._cascade_delete(
+        "entities",
+        {"type": "entity"},
+        [],
+        batch_size=2,
+        projection=["_id"],
+        run_post_crud_hook=False,
+    )
+
+    assert list(batches) == [
+        [{"_id": "a"}, {"_id": "b"}],
+        [{"_id": "c"}, {"_id": "d"}],
+        [{"_id": "e"}],
+    ]
+    assert _get(resource.storage, "entities", "a") is None